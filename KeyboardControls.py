@@ -1,4 +1,4 @@
-from main import LabyrinthSolverAPI, graphics
+from main import LabyrinthSolverAPI
 import keyboard as kb
 
 game_on = True
@@ -16,4 +16,4 @@ for hotkey in ("up", "left", "down", "right"):
 
 kb.add_hotkey('esc', stop_game)
 
-graphics.loop()
+Labyrinth.graphics.loop()
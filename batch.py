@@ -0,0 +1,136 @@
+"""
+Batch generation of many labyrinths over several processes, without pygame.
+
+Labyrinths are split into shards of a fixed number of labyrinths. Every shard is generated by one worker of a
+ProcessPoolExecutor and written to its own file, as labyrinth files (see mazefile) put back to back, so a worker only
+ever holds one labyrinth in memory. The seed of every labyrinth only depends on the base seed and its number, and
+the shards only on the seeds, so the output is byte for byte the same whatever the number of workers.
+Each labyrinth is the one ChallengeLabyrinth(side, algorithm=algorithm, seed=seed) would build.
+
+index.json lists the shards and, for every labyrinth, its seed and position in its shard. read_maze loads one back.
+
+    python batch.py 10000 50 --algorithm dfs --seed 1 --out mazes
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from grid import MazeGrid
+import generators
+import mazefile
+
+INDEX_NAME: str = "index.json"
+
+
+def maze_seed(base_seed: int, number: int) -> int:
+    """
+    derives the seed of one labyrinth of a batch
+    :param base_seed: seed of the whole batch
+    :param number: number of the labyrinth in the batch
+    :return: a 64 bits seed
+    """
+    return int.from_bytes(hashlib.sha256(f"{base_seed}:{number}".encode()).digest()[:8], "little")
+
+
+def generate_maze(side: int, algorithm: str, seed: int) -> MazeGrid:
+    """
+    generates a labyrinth the way ChallengeLabyrinth does, from the (0, 0) - (0, 1) seeded path
+    :param side: side of the labyrinth
+    :param algorithm: name of the generation algorithm, one of generators.GENERATORS
+    :param seed: seed of the generation
+    :return: the labyrinth
+    """
+    grid = MazeGrid(side)
+    grid.link((0, 0), (0, 1))
+    generators.generate(grid, algorithm, random.Random(seed))
+    return grid
+
+
+def _generate_shard(task: tuple[str, int, int, int, str, int]) -> list[list[int]]:
+    """
+    generates the labyrinths of a shard and writes them to the shard file, runs in a worker process
+    :param task: tuple (path, first number, count, side, algorithm, base seed)
+    :return: [seed, offset in the file] of every labyrinth of the shard
+    """
+    path, first, count, side, algorithm, base_seed = task
+    entries = []
+    offset = 0
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        for number in range(first, first + count):
+            seed = maze_seed(base_seed, number)
+            data = mazefile.encode(generate_maze(side, algorithm, seed), seed, algorithm)
+            file.write(data)
+            entries.append([seed, offset])
+            offset += len(data)
+    os.replace(temporary, path)
+    return entries
+
+
+def generate_batch(count: int,
+                   side: int,
+                   algorithm: str = "grow",
+                   base_seed: int = 0,
+                   out_dir: str = "mazes",
+                   workers: Optional[int] = None,
+                   shard_size: int = 256) -> str:
+    """
+    generates many labyrinths in parallel, into shard files and an index
+    :param count: number of labyrinths
+    :param side: side of every labyrinth
+    :param algorithm: name of the generation algorithm, one of generators.GENERATORS
+    :param base_seed: seed the seeds of all the labyrinths are derived from
+    :param out_dir: directory to write the shards and the index to, created if needed
+    :param workers: number of worker processes, one per core if None
+    :param shard_size: number of labyrinths per shard file
+    :return: the path of the index
+    """
+    if algorithm not in generators.GENERATORS:
+        raise NameError(f"Invalid algorithm: {algorithm}")
+    os.makedirs(out_dir, exist_ok=True)
+    names = [f"shard-{first // shard_size:05d}.laby" for first in range(0, count, shard_size)]
+    tasks = [(os.path.join(out_dir, name), first, min(shard_size, count - first), side, algorithm, base_seed)
+             for name, first in zip(names, range(0, count, shard_size))]
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_generate_shard, tasks)
+        shards = [{"file": name, "mazes": entries} for name, entries in zip(names, results)]
+    index = {"count": count, "side": side, "algorithm": algorithm, "base_seed": base_seed, "shard_size": shard_size,
+             "shards": shards}
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    with open(index_path, "w") as file:
+        json.dump(index, file)
+    return index_path
+
+
+def read_maze(out_dir: str, number: int, index: Optional[dict] = None) -> MazeGrid:
+    """
+    loads one labyrinth of a batch
+    :param out_dir: directory the batch was written to
+    :param number: number of the labyrinth in the batch
+    :param index: the content of the batch index, read from out_dir if None
+    :return: the labyrinth
+    """
+    if index is None:
+        with open(os.path.join(out_dir, INDEX_NAME)) as file:
+            index = json.load(file)
+    shard = index["shards"][number // index["shard_size"]]
+    seed, offset = shard["mazes"][number % index["shard_size"]]
+    with mazefile.MappedMaze(os.path.join(out_dir, shard["file"]), offset) as maze:
+        return maze.to_grid()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="generates many labyrinths in parallel")
+    parser.add_argument("count", type=int)
+    parser.add_argument("side", type=int)
+    parser.add_argument("--algorithm", default="grow")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="mazes")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=256)
+    arguments = parser.parse_args()
+    print(generate_batch(arguments.count, arguments.side, arguments.algorithm, arguments.seed, arguments.out,
+                         arguments.workers, arguments.shard_size))
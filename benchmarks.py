@@ -0,0 +1,268 @@
+"""
+Benchmark suite: times every stage of building, solving, playing and drawing a labyrinth over several sides, and
+records the peak memory each one allocates (tracemalloc). Rendering runs on SDL's dummy video driver, so no window
+is needed.
+
+Results are written as JSON. Given a baseline from an earlier run, every stage that got slower (or allocates more)
+than its threshold allows is reported and the run exits with status 1, so it can gate changes:
+
+    python benchmarks.py --out before.json
+    python benchmarks.py --out after.json --baseline before.json --tolerance 1.3 --threshold move=1.1
+
+Timings under min_seconds are too noisy to compare and are never reported as regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable, Optional
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+from grid import DIRECTIONS
+from grid import run_moves
+import main
+
+SIDES: tuple[int, ...] = (10, 100, 500, 1000, 2000)
+MOVES: int = 100_000  # moves made by the move throughput stages
+NEIGHBOUR_LOOKUPS: int = 100_000  # calls made by the get_neighbours stage
+min_seconds: float = 0.005
+
+StageSetup = Callable[[int], Callable[[], Any]]
+
+# stage name -> (setup, biggest side to run it on, fresh). setup builds what the stage needs, untimed, and returns
+# the function to time. Stages that use up what setup built, such as generating a table, are fresh: setup is called
+# again before every timed run.
+STAGES: dict[str, tuple[StageSetup, int, bool]] = {}
+
+
+def register_stage(name: str, max_side: int = 0, fresh: bool = False) -> Callable[[StageSetup], StageSetup]:
+    """
+    decorator registering a benchmark stage
+    :param name: the name of the stage
+    :param max_side: biggest side the stage is run on, 0 for no limit
+    :param fresh: if set, setup is called before every timed run, for stages that can only run once on what it built
+    :return: the decorator
+    """
+    def decorator(setup: StageSetup) -> StageSetup:
+        STAGES[name] = (setup, max_side, fresh)
+        return setup
+    return decorator
+
+
+def _labyrinth(side: int) -> main.CellTable:
+    """
+    :param side: side of the labyrinth
+    :return: the table of a seeded "grow" labyrinth
+    """
+    table = main.create_table(side)
+    main.link_path([table[0][0], table[0][1]])
+    main.create_ramifications(table, "grow", None, random.Random(side))
+    return table
+
+
+def _api(side: int) -> main.LabyrinthSolverAPI:
+    """
+    :param side: side of the labyrinth
+    :return: a headless, seeded solver API
+    """
+    return main.LabyrinthSolverAPI(side, backend="null", win_callback=lambda: None, seed=side)
+
+
+@register_stage("create_table")
+def bench_create_table(side: int) -> Callable[[], Any]:
+    return lambda: main.create_table(side)
+
+
+@register_stage("create_ramifications", fresh=True)
+def bench_create_ramifications(side: int) -> Callable[[], Any]:
+    table = main.create_table(side)
+    main.link_path([table[0][0], table[0][1]])
+    return lambda: main.create_ramifications(table, "grow", None, random.Random(side))
+
+
+@register_stage("get_neighbours")
+def bench_get_neighbours(side: int) -> Callable[[], Any]:
+    table = main.create_table(side)
+    cells = [table[i % side][i // side % side] for i in range(0, NEIGHBOUR_LOOKUPS * 7919, 7919)]
+
+    def run() -> None:
+        for cell in cells:
+            main.get_neighbours(table, cell)
+    return run
+
+
+@register_stage("randomize", 1000)
+def bench_randomize(side: int) -> Callable[[], Any]:
+    cells = [cell for column in main.create_table(side) for cell in column]
+    return lambda: main.randomize(cells)
+
+
+@register_stage("carve_path")
+def bench_carve_path(side: int) -> Callable[[], Any]:
+    table = main.create_table(side)
+    return lambda: main.carve_path(table, random.Random(side))
+
+
+@register_stage("solve")
+def bench_solve(side: int) -> Callable[[], Any]:
+    api = _api(side)
+    return api.solve
+
+
+@register_stage("move")
+def bench_move(side: int) -> Callable[[], Any]:
+    api = _api(side)
+    rng = random.Random(side)
+    directions = [DIRECTIONS[int(rng.random() * 4)] for _ in range(MOVES)]
+
+    def run() -> None:
+        move = api.move
+        for direction in directions:
+            move(direction)
+    return run
+
+
+@register_stage("move_many")
+def bench_move_many(side: int) -> Callable[[], Any]:
+    grid = _api(side).grid
+    rng = random.Random(side)
+    codes = bytes(int(rng.random() * 4) for _ in range(MOVES))
+    # the moves of LabyrinthSolverAPI.move_many, without a stop cell so that every run makes MOVES moves
+    return lambda: run_moves(grid, 0, codes)
+
+
+@register_stage("draw_table", 300)
+def bench_draw_table(side: int) -> Callable[[], Any]:
+    import pygame_graphics
+    table = _labyrinth(side)
+    pygame_graphics.init(side)
+    return lambda: pygame_graphics.draw_table(table, {table[0][0], table[-1][-1]})
+
+
+@register_stage("draw_cells", 300)
+def bench_draw_cells(side: int) -> Callable[[], Any]:
+    import pygame_graphics
+    grid = _labyrinth(side).grid
+    pygame_graphics.init(side)
+
+    def run() -> None:
+        for index, mask in enumerate(grid.cells):
+            x, y = grid.position(index)
+            pygame_graphics.draw_cell((x, y), False, False)
+            if mask & 8:
+                pygame_graphics.draw_path((x, y), (x + 1, y), False)
+            if mask & 4:
+                pygame_graphics.draw_path((x, y), (x, y + 1), False)
+        pygame_graphics.flush(True)
+    return run
+
+
+def measure(setup: StageSetup, side: int, repeat: int = 3, fresh: bool = False) -> dict[str, float]:
+    """
+    times a stage, then runs it once more under tracemalloc for its peak memory
+    :param setup: the stage setup function
+    :param side: side of the labyrinth
+    :param repeat: number of timed runs, the fastest one is kept
+    :param fresh: if set, setup is called again, untimed, before every timed run
+    :return: dict with "seconds", the best time, and "peak_bytes", the peak memory allocated by one run
+    """
+    function = setup(side)
+    best = float("inf")
+    for n in range(repeat):
+        if fresh and n:
+            function = setup(side)
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    function = setup(side)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run_benchmarks(sides: tuple[int, ...] = SIDES,
+                   stages: Optional[list[str]] = None,
+                   repeat: int = 3) -> dict[str, Any]:
+    """
+    runs every stage over every side it is allowed on
+    :param sides: labyrinth sides to run the stages on
+    :param stages: names of the stages to run, all of STAGES if None
+    :param repeat: number of timed runs per stage and side
+    :return: dict with "environment" and "results", results being {stage: {side: measure(...)}}
+    """
+    if stages is None:
+        stages = list(STAGES)
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for name in stages:
+        if name not in STAGES:
+            raise NameError(f"Invalid stage: {name}")
+        setup, max_side, fresh = STAGES[name]
+        results[name] = {str(side): measure(setup, side, repeat, fresh)
+                         for side in sides if not max_side or side <= max_side}
+    return {"environment": {"python": sys.version.split()[0], "platform": platform.platform()}, "results": results}
+
+
+def compare(results: dict[str, Any],
+            baseline: dict[str, Any],
+            tolerance: float = 1.5,
+            thresholds: Optional[dict[str, float]] = None,
+            memory_tolerance: float = 1.5) -> list[str]:
+    """
+    finds the stages that regressed against a baseline run
+    :param results: output of run_benchmarks
+    :param baseline: output of an earlier run_benchmarks
+    :param tolerance: allowed ratio of new time over baseline time
+    :param thresholds: per stage allowed time ratios, overriding tolerance
+    :param memory_tolerance: allowed ratio of new peak memory over baseline peak memory
+    :return: a description of every regression, empty if there are none
+    """
+    thresholds = thresholds or {}
+    regressions = []
+    for name, by_side in results["results"].items():
+        limit = thresholds.get(name, tolerance)
+        for side, new in by_side.items():
+            old = baseline["results"].get(name, {}).get(side)
+            if old is None:
+                continue
+            if new["seconds"] >= min_seconds and new["seconds"] > old["seconds"] * limit:
+                regressions.append(f"{name} side {side}: {old['seconds']:.4f}s -> {new['seconds']:.4f}s "
+                                   f"(x{new['seconds'] / old['seconds']:.2f}, limit x{limit})")
+            if old["peak_bytes"] and new["peak_bytes"] > old["peak_bytes"] * memory_tolerance:
+                regressions.append(f"{name} side {side}: peak {old['peak_bytes']} -> {new['peak_bytes']} bytes "
+                                   f"(x{new['peak_bytes'] / old['peak_bytes']:.2f}, limit x{memory_tolerance})")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="times the labyrinth stages and checks for regressions")
+    parser.add_argument("--sides", type=int, nargs="+", default=list(SIDES))
+    parser.add_argument("--stages", nargs="+", default=None, help="stages to run, all by default")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="benchmarks.json", help="file to write the results to")
+    parser.add_argument("--baseline", default=None, help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown ratio")
+    parser.add_argument("--memory-tolerance", type=float, default=1.5, help="allowed peak memory ratio")
+    parser.add_argument("--threshold", action="append", default=[], metavar="STAGE=RATIO",
+                        help="allowed slowdown ratio of one stage")
+    arguments = parser.parse_args()
+
+    report = run_benchmarks(tuple(arguments.sides), arguments.stages, arguments.repeat)
+    with open(arguments.out, "w") as out_file:
+        json.dump(report, out_file, indent=1)
+    for stage, timings in report["results"].items():
+        print(stage.ljust(22) + "".join(f"{side}: {m['seconds']:.4f}s {m['peak_bytes'] / 1e6:.1f}MB".ljust(28)
+                                        for side, m in timings.items()))
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as baseline_file:
+            found = compare(report, json.load(baseline_file), arguments.tolerance,
+                            {stage: float(ratio) for stage, ratio in (t.split("=") for t in arguments.threshold)},
+                            arguments.memory_tolerance)
+        for regression in found:
+            print("REGRESSION", regression)
+        if found:
+            sys.exit(1)
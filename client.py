@@ -0,0 +1,125 @@
+"""
+Client of the labyrinth server (see server.py), using nothing but asyncio. Also a reference for clients written in
+other languages: the protocol is one line per request and per answer.
+
+    client = await MazeClient.connect("127.0.0.1", 7777)
+    session = await client.new(100, seed=1)
+    results, position, mask = await client.move(session, "rrddl")
+    answers = await client.pipeline([(session, "uldr" * 100)] * 50)  # 50 batches, a single round trip
+"""
+import asyncio
+from typing import Optional
+
+Answer = tuple[bytes, tuple[int, int], int]
+
+
+class ServerError(Exception):
+    def __init__(self, arg: str = ""):
+        super().__init__(arg)
+
+
+class MazeClient:
+    """
+    MazeClient class: one connection to a labyrinth server, with any number of sessions on it.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        MazeClient class builder, see connect
+        :param reader: the connection's input
+        :param writer: the connection's output
+        """
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 7777, path: Optional[str] = None) -> "MazeClient":
+        """
+        connects to a server
+        :param host: server address
+        :param port: server TCP port
+        :param path: if set, connects to this Unix socket instead
+        :return: the client
+        """
+        limit = 1 << 20
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=limit)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=limit)
+        return cls(reader, writer)
+
+    async def _answer(self) -> list[bytes]:
+        """
+        :return: the words of the next answer
+        """
+        words = (await self.reader.readline()).split()
+        if not words:
+            raise ServerError("connection closed")
+        if words[0] == b"ERR":
+            raise ServerError(b" ".join(words[1:]).decode())
+        return words
+
+    async def request(self, line: str) -> list[bytes]:
+        """
+        sends a request and waits for its answer
+        :param line: the request, without its line ending
+        :return: the words of the answer
+        """
+        self.writer.write(line.encode() + b"\n")
+        return await self._answer()
+
+    async def new(self, side: int, seed: int = 0, algorithm: str = "grow") -> int:
+        """
+        opens a session
+        :param side: side of the labyrinth
+        :param seed: seed of the labyrinth
+        :param algorithm: name of the generation algorithm
+        :return: the session id
+        """
+        return int((await self.request(f"NEW {side} {seed} {algorithm}"))[1])
+
+    async def move(self, session: int, moves: str) -> Answer:
+        """
+        moves a cursor along a batch of moves
+        :param session: the session id
+        :param moves: letters u, l, d or r
+        :return: the results, one byte b"0" or b"1" per move made, the new position and the cell mask
+        """
+        return self._parse_move(await self.request(f"M {session} {moves}"))
+
+    async def pipeline(self, batches: list[tuple[int, str]]) -> list[Answer]:
+        """
+        sends many move batches at once, then reads all the answers, paying a single round trip
+        :param batches: list of (session id, moves)
+        :return: the answer to every batch, as returned by move
+        """
+        self.writer.write(b"".join(b"M %d %s\n" % (session, moves.encode()) for session, moves in batches))
+        return [self._parse_move(await self._answer()) for _ in batches]
+
+    async def stats(self, session: int) -> dict[str, int]:
+        """
+        :param session: the session id
+        :return: the position, moves made, wrong moves and win state of the session's cursor
+        """
+        words = await self.request(f"S {session}")
+        return {"x": int(words[1]), "y": int(words[2]), "moves_made": int(words[3]), "wrong_moves": int(words[4]),
+                "won": int(words[5])}
+
+    async def quit(self, session: int) -> None:
+        """
+        closes a session
+        :param session: the session id
+        """
+        await self.request(f"Q {session}")
+
+    async def close(self) -> None:
+        """
+        closes the connection, and with it all its sessions
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    @staticmethod
+    def _parse_move(words: list[bytes]) -> Answer:
+        if len(words) == 4:  # empty batch, no results
+            words.insert(1, b"")
+        return words[1], (int(words[2]), int(words[3])), int(words[4])
@@ -0,0 +1,736 @@
+"""
+Labyrinth generation algorithms.
+
+Every generator takes a MazeGrid, a random.Random instance and an optional on_link callback, and links the cells of
+the grid into a perfect labyrinth (a spanning tree of the grid). Cells that are already linked when the generator
+starts are kept as they are and grown from, so they must form a single tree (e.g. the seeded path of a
+ChallengeLabyrinth). on_link is called with the flat indexes of both cells every time a link is made.
+
+All the algorithms below are linear in the number of cells, apart from "sweep" which is the original
+create_ramifications behaviour and "wilson" whose random walks are expected O(cells * log(cells)).
+regenerate_region reshuffles a part of a labyrinth in place, in a time linear in its area.
+braid turns a perfect labyrinth into one with loops, by removing some or all of its dead ends.
+eller_rows can also stream a labyrinth row by row without ever holding it whole, e.g. to a file with
+mazefile.save_rows. "tiled", from tiled.py, spreads huge labyrinths over several processes.
+
+Generation time in seconds, CPython 3.11, `python generators.py` (sweep stopped after 500):
+
+    side    grow     dfs      kruskal  prim     wilson   sweep    eller
+    100     0.03     0.02     0.03     0.03     0.04     1.27     0.01
+    500     0.63     0.52     1.32     0.82     1.76     195      0.22
+    1000    3.14     1.87     6.30     2.72     5.36     -        1.42
+    2000    11.2     8.73     29.6     14.1     24.5     -        5.14
+"""
+import random
+import re
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+from grid import MazeGrid
+
+GeneratorFunction = Callable[[MazeGrid, random.Random, Optional[Callable[[int, int], None]]], None]
+
+GENERATORS: dict[str, GeneratorFunction] = {}
+# algorithms that can't grow around a long pre-linked path: "eller" only keeps pre-linked cells that don't close a
+# loop with the rows it makes, and "tiled" rejects links across tile borders
+NO_LONG_PATH: frozenset[str] = frozenset(("eller", "tiled"))
+
+sweep_passes: int = 0  # passes over the grid made by "sweep" so far, read by metrics
+# cells whose neighbours the generators looked up so far, read by metrics. "kruskal" and "eller" don't look any up,
+# they go through walls and rows, and "tiled" looks them up in its worker processes, which aren't counted.
+neighbour_lookups: int = 0
+
+_LINKED = re.compile(b"[^\x00]")
+_NON_ZERO = bytes([0] + [1] * 255)
+_DEAD_END = re.compile(b"[\x01\x02\x04\x08]")  # masks open in a single direction
+
+
+def register_generator(name: str) -> Callable[[GeneratorFunction], GeneratorFunction]:
+    """
+    decorator registering a generation algorithm under a name, so it can be picked by ChallengeLabyrinth
+    :param name: the name of the algorithm
+    :return: the decorator
+    """
+    def decorator(function: GeneratorFunction) -> GeneratorFunction:
+        GENERATORS[name] = function
+        return function
+    return decorator
+
+
+def generate(grid: MazeGrid,
+             algorithm: str = "grow",
+             rng: Optional[random.Random] = None,
+             on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    links the cells of a grid into a labyrinth, using one of the registered algorithms
+    :param grid: the grid to link, possibly with a pre-linked tree of cells
+    :param algorithm: name of the algorithm, one of GENERATORS
+    :param rng: random number generator to use, a fresh unseeded one if None
+    :param on_link: function called with the indexes of both cells each time two cells are linked
+    :return: None.
+    """
+    if algorithm not in GENERATORS:
+        raise NameError(f"Invalid algorithm: {algorithm}")
+    if rng is None:
+        rng = random.Random()
+    GENERATORS[algorithm](grid, rng, on_link)
+
+
+def _start(grid: MazeGrid, rng: random.Random) -> tuple[bytearray, list[int]]:
+    """
+    finds the cells generation starts from: the already linked ones, or a random cell if there are none
+    :param grid: the grid being generated
+    :param rng: random number generator
+    :return: a bytearray flagging the cells in the tree, and the list of their indexes
+    """
+    in_tree = grid.cells.translate(_NON_ZERO)
+    tree = [match.start() for match in _LINKED.finditer(grid.cells)]
+    if not tree:
+        start = rng.randrange(len(grid.cells))
+        in_tree[start] = 1
+        tree = [start]
+    return in_tree, tree
+
+
+@register_generator("grow")
+def grow(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    grows the labyrinth from its linked cells: a random empty cell next to the tree is linked to a random linked
+    neighbour, until no empty cell is left. Same rule as the original create_ramifications, with a frontier list
+    instead of repeated sweeps.
+    """
+    global neighbour_lookups
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    rand = rng.random
+    state, tree = _start(grid, rng)  # 0: empty, 1: linked, 2: in the frontier
+    frontier: list[int] = []
+    lookups = len(tree)
+    for i in tree:
+        x = i % w
+        if i >= w and not state[i - w]:
+            state[i - w] = 2
+            frontier.append(i - w)
+        if x and not state[i - 1]:
+            state[i - 1] = 2
+            frontier.append(i - 1)
+        if i + w < n and not state[i + w]:
+            state[i + w] = 2
+            frontier.append(i + w)
+        if x != w - 1 and not state[i + 1]:
+            state[i + 1] = 2
+            frontier.append(i + 1)
+
+    while frontier:
+        k = int(rand() * len(frontier))
+        i = frontier[k]
+        frontier[k] = frontier[-1]
+        frontier.pop()
+        lookups += 1
+        x = i % w
+        linked = []
+        if i >= w:
+            s = state[i - w]
+            if s == 1:
+                linked.append(0)
+            elif not s:
+                state[i - w] = 2
+                frontier.append(i - w)
+        if x:
+            s = state[i - 1]
+            if s == 1:
+                linked.append(1)
+            elif not s:
+                state[i - 1] = 2
+                frontier.append(i - 1)
+        if i + w < n:
+            s = state[i + w]
+            if s == 1:
+                linked.append(2)
+            elif not s:
+                state[i + w] = 2
+                frontier.append(i + w)
+        if x != w - 1:
+            s = state[i + 1]
+            if s == 1:
+                linked.append(3)
+            elif not s:
+                state[i + 1] = 2
+                frontier.append(i + 1)
+        code = linked[int(rand() * len(linked))]
+        j = i + (-w, -1, w, 1)[code]
+        cells[i] |= 1 << code
+        cells[j] |= 1 << (code ^ 2)
+        state[i] = 1
+        if on_link is not None:
+            on_link(i, j)
+    neighbour_lookups += lookups
+
+
+@register_generator("dfs")
+def randomized_dfs(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    recursive backtracker, with an explicit stack: walks to random unvisited neighbours, backtracks when stuck.
+    Gives long, winding corridors.
+    """
+    global neighbour_lookups
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    rand = rng.random
+    visited, stack = _start(grid, rng)
+    lookups = 0
+    while stack:
+        i = stack[-1]
+        lookups += 1
+        x = i % w
+        options = []
+        if i >= w and not visited[i - w]:
+            options.append(0)
+        if x and not visited[i - 1]:
+            options.append(1)
+        if i + w < n and not visited[i + w]:
+            options.append(2)
+        if x != w - 1 and not visited[i + 1]:
+            options.append(3)
+        if not options:
+            stack.pop()
+            continue
+        code = options[int(rand() * len(options))]
+        j = i + (-w, -1, w, 1)[code]
+        cells[i] |= 1 << code
+        cells[j] |= 1 << (code ^ 2)
+        visited[j] = 1
+        stack.append(j)
+        if on_link is not None:
+            on_link(i, j)
+    neighbour_lookups += lookups
+
+
+@register_generator("kruskal")
+def kruskal(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    randomized Kruskal: opens the walls in random order, unless both sides are already connected.
+    Connectivity is tracked with a union-find forest using path halving.
+    """
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    parent = list(range(n))
+    remaining = n - 1
+    # edge e joins cell e >> 1 to its right (e & 1 == 0) or bottom (e & 1 == 1) neighbour
+    edges = [i << 1 for i in range(n) if i % w != w - 1]
+    edges += [(i << 1) | 1 for i in range(n - w)]
+
+    def find(a: int) -> int:
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for match in _LINKED.finditer(cells):
+        i = match.start()
+        if cells[i] & 8:
+            parent[find(i)] = find(i + 1)
+            remaining -= 1
+        if cells[i] & 4:
+            parent[find(i)] = find(i + w)
+            remaining -= 1
+    rng.shuffle(edges)
+    for e in edges:
+        if remaining == 0:
+            break
+        i = e >> 1
+        if e & 1:
+            j = i + w
+            a, b = 4, 1
+        else:
+            j = i + 1
+            a, b = 8, 2
+        ri = i
+        while parent[ri] != ri:
+            parent[ri] = parent[parent[ri]]
+            ri = parent[ri]
+        rj = j
+        while parent[rj] != rj:
+            parent[rj] = parent[parent[rj]]
+            rj = parent[rj]
+        if ri == rj:
+            continue
+        parent[ri] = rj
+        cells[i] |= a
+        cells[j] |= b
+        remaining -= 1
+        if on_link is not None:
+            on_link(i, j)
+
+
+@register_generator("prim")
+def prim(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    randomized Prim: keeps a frontier set of walls between the tree and the rest of the grid, and opens a random
+    one whenever its far side is still outside the tree.
+    """
+    global neighbour_lookups
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    rand = rng.random
+    in_tree, tree = _start(grid, rng)
+    lookups = len(tree)  # one per call of add_walls
+    walls: list[int] = []  # wall i << 2 | code goes from cell i, in the tree, in direction code
+
+    def add_walls(i: int) -> None:
+        x = i % w
+        if i >= w and not in_tree[i - w]:
+            walls.append(i << 2)
+        if x and not in_tree[i - 1]:
+            walls.append(i << 2 | 1)
+        if i + w < n and not in_tree[i + w]:
+            walls.append(i << 2 | 2)
+        if x != w - 1 and not in_tree[i + 1]:
+            walls.append(i << 2 | 3)
+
+    for cell in tree:
+        add_walls(cell)
+    while walls:
+        k = int(rand() * len(walls))
+        wall = walls[k]
+        walls[k] = walls[-1]
+        walls.pop()
+        i = wall >> 2
+        code = wall & 3
+        j = i + (-w, -1, w, 1)[code]
+        if in_tree[j]:
+            continue
+        cells[i] |= 1 << code
+        cells[j] |= 1 << (code ^ 2)
+        in_tree[j] = 1
+        add_walls(j)
+        lookups += 1
+        if on_link is not None:
+            on_link(i, j)
+    neighbour_lookups += lookups
+
+
+@register_generator("wilson")
+def wilson(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    Wilson's algorithm: loop-erased random walks from every cell outside the tree until they hit it.
+    Unbiased (uniform spanning tree), but the first walks are long on big grids.
+    """
+    global neighbour_lookups
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    rand = rng.random
+    in_tree, _ = _start(grid, rng)
+    lookups = 0  # one per step of the walks
+    walk = bytearray(n)  # last direction taken from each cell, overwriting it erases loops
+    steps = (-w, -1, w, 1)
+    for start in range(n):
+        if in_tree[start]:
+            continue
+        i = start
+        while not in_tree[i]:
+            x = i % w
+            while True:
+                code = int(rand() * 4)
+                if code == 0:
+                    if i >= w:
+                        break
+                elif code == 1:
+                    if x:
+                        break
+                elif code == 2:
+                    if i + w < n:
+                        break
+                elif x != w - 1:
+                    break
+            walk[i] = code
+            i += steps[code]
+            lookups += 1
+        i = start
+        while not in_tree[i]:
+            code = walk[i]
+            j = i + steps[code]
+            cells[i] |= 1 << code
+            cells[j] |= 1 << (code ^ 2)
+            in_tree[i] = 1
+            if on_link is not None:
+                on_link(i, j)
+            i = j
+    neighbour_lookups += lookups
+
+
+@register_generator("sweep")
+def sweep(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    the original create_ramifications algorithm: sweeps over the whole grid in random order, linking every empty
+    cell that has a linked neighbour, until no empty cell is left. Quadratic, kept for reference.
+    """
+    w, h = grid.width, grid.height
+    global sweep_passes, neighbour_lookups
+    cells = grid.cells
+    in_tree, _ = _start(grid, rng)
+    empty_left = True
+    while empty_left:
+        sweep_passes += 1
+        empty_left = False
+        columns = list(range(w))
+        rng.shuffle(columns)
+        for x in columns:
+            rows = list(range(h))
+            rng.shuffle(rows)
+            for y in rows:
+                i = y * w + x
+                if in_tree[i]:
+                    continue
+                empty_left = True
+                neighbours = grid.neighbour_indices(i)
+                neighbour_lookups += 1
+                rng.shuffle(neighbours)
+                for j in neighbours:
+                    if in_tree[j]:
+                        code = grid.direction(i, j)
+                        cells[i] |= 1 << code
+                        cells[j] |= 1 << (code ^ 2)
+                        in_tree[i] = 1
+                        if on_link is not None:
+                            on_link(i, j)
+                        break
+
+
+def eller_rows(width: int,
+               height: Optional[int] = None,
+               rng: Optional[random.Random] = None,
+               prelinked: Optional[Callable[[int], bytes]] = None) -> Iterator[bytearray]:
+    """
+    Eller's algorithm: generates a perfect labyrinth one row at a time, only remembering which set each cell of the
+    current row belongs to. Memory use is O(width) whatever the height.
+    :param width: number of cells in a row
+    :param height: number of rows, None for an endless labyrinth. The last row is only closed (all its sets merged)
+    when the height is known, so stopping an endless one early leaves its bottom row open downwards.
+    :param rng: random number generator to use, a fresh unseeded one if None
+    :param prelinked: function giving the masks of the row y before generation. Its vertical links are always kept,
+    its horizontal links are kept unless they would close a loop, in which case ValueError is raised.
+    :return: an iterator over the rows, each a bytearray of cell masks with the same bits as MazeGrid.cells
+    """
+    if rng is None:
+        rng = random.Random()
+    rand = rng.random
+    sets = list(range(width))  # set id of every cell of the current row
+    members: dict[int, list[int]] = {x: [x] for x in range(width)}
+    next_id = width
+    up = bytearray(width)
+    y = 0
+    while height is None or y < height:
+        last = height is not None and y == height - 1
+        forced = prelinked(y) if prelinked is not None else None
+        row = bytearray(up)  # the cells linked downwards from the previous row are open upwards
+
+        for x in range(width - 1):
+            a, b = sets[x], sets[x + 1]
+            force = forced is not None and forced[x] & 8
+            if a == b:
+                if force:
+                    raise ValueError("pre-linked cells form a loop with the generated ones")
+                continue
+            if force or last or rand() < .5:
+                row[x] |= 8
+                row[x + 1] |= 2
+                if len(members[a]) < len(members[b]):
+                    a, b = b, a
+                for m in members[b]:
+                    sets[m] = a
+                members[a] += members.pop(b)
+
+        if last:
+            yield row
+            return
+
+        down = bytearray(width)
+        for xs in members.values():
+            chosen = [x for x in xs if (forced is not None and forced[x] & 4) or rand() < .5]
+            if not chosen:
+                chosen = [xs[int(rand() * len(xs))]]
+            for x in chosen:
+                down[x] = 1
+                row[x] |= 4
+        yield row
+
+        members = {}
+        for x in range(width):
+            if not down[x]:
+                sets[x] = next_id
+                next_id += 1
+            members.setdefault(sets[x], []).append(x)
+        up = down
+        y += 1
+
+
+@register_generator("eller")
+def eller(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    fills the grid with the rows of eller_rows, keeping the already linked cells.
+    """
+    w = grid.width
+    cells = grid.cells
+
+    def prelinked(y: int) -> bytes:
+        return cells[y * w:(y + 1) * w]
+
+    for y, row in enumerate(eller_rows(w, grid.height, rng, prelinked)):
+        base = y * w
+        if on_link is not None:
+            for x, mask in enumerate(row):
+                new = mask & ~cells[base + x]
+                if new & 8:
+                    on_link(base + x, base + x + 1)
+                if new & 4:
+                    on_link(base + x, base + x + w)
+        cells[base:base + w] = row
+
+
+@register_generator("tiled")
+def tiled(grid: MazeGrid, rng: random.Random, on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    generates the labyrinth with tiled.generate_tiled, using the tile_size, tile_algorithm and max_workers globals of
+    tiled. The module, and the multiprocessing machinery it needs, is only imported the first time it is used.
+    """
+    import tiled as tiled_module
+    tiled_module.generate_tiled(grid, rng, on_link)
+
+
+def braid(grid: MazeGrid,
+          rng: random.Random,
+          density: float = 1.,
+          on_link: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    braids a labyrinth: removes dead ends by opening one more of their walls, which makes a loop every time, so that
+    following walls or filling dead ends no longer solves it. Dead ends are indexed in a single pass over the grid,
+    then visited in random order. A dead end is preferably opened into a neighbouring dead end, removing both at
+    once, then straight ahead, continuing its corridor, then to a side. Walls whose opening would make an open 2 x 2
+    square (the fourth cell of the square already linked to two of the others) are left closed. Linear in the number
+    of cells.
+    :param grid: the labyrinth to braid, usually a perfect one
+    :param rng: random number generator
+    :param density: share of the dead ends to remove, 0 to 1
+    :param on_link: function called with the flat indexes of both cells of every opened wall
+    :return: the number of walls opened, i.e. of loops made
+    """
+    cells = grid.cells
+    w = grid.width
+    n = len(cells)
+    steps = (-w, -1, w, 1)
+    dead_ends = [match.start() for match in _DEAD_END.finditer(cells)]
+    rng.shuffle(dead_ends)
+    rand = rng.random
+    target = round(density * len(dead_ends))
+    removed = 0
+    opened = 0
+    for i in dead_ends:
+        if removed >= target:
+            break
+        mask = cells[i]
+        if mask & (mask - 1):  # no longer a dead end, opened into by an earlier one
+            continue
+        ahead = (mask.bit_length() - 1) ^ 2
+        x = i % w
+        inside = (i >= w, x > 0, i + w < n, x < w - 1)
+        best = -1
+        best_rank = 3
+        for code in (ahead, ahead ^ 1, ahead ^ 3):
+            if not inside[code]:
+                continue
+            j = i + steps[code]
+            # the two squares sharing the wall, on both sides of it
+            side = code ^ 1
+            if mask >> side & 1 and cells[j] >> side & 1 and cells[i + steps[side]] >> code & 1:
+                continue
+            side = code ^ 3
+            if mask >> side & 1 and cells[j] >> side & 1 and cells[i + steps[side]] >> code & 1:
+                continue
+            other = cells[j]
+            rank = 0 if other and not other & (other - 1) else 1 if code == ahead else 2
+            if rank < best_rank or rank == best_rank == 2 and rand() < .5:
+                best, best_rank = code, rank
+        if best < 0:
+            continue
+        j = i + steps[best]
+        removed += 2 if best_rank == 0 else 1
+        cells[i] |= 1 << best
+        cells[j] |= 1 << (best ^ 2)
+        opened += 1
+        if on_link is not None:
+            on_link(i, j)
+    return opened
+
+
+def regenerate_region(grid: MazeGrid,
+                      rng: random.Random,
+                      x: int,
+                      y: int,
+                      width: int,
+                      height: int,
+                      on_link: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    reshuffles a rectangular region of a labyrinth, touching nothing outside of it, in a time linear in its area.
+    The links crossing the region border are kept, and so is the skeleton of the links inside the region that joins
+    them to one another: the smallest part of the old labyrinth that keeps every outside cell connected the way it
+    was. All the other links of the region are cut, and its cells are grown back onto the skeleton like "grow" does.
+    A perfect labyrinth stays perfect, and any two cells that were connected still are. Loops made by braid inside
+    the region are removed.
+    :param grid: the labyrinth
+    :param rng: random number generator
+    :param x: x coordinate of the top left cell of the region
+    :param y: y coordinate of the top left cell of the region
+    :param width: number of cells of the region along x
+    :param height: number of cells of the region along y
+    :param on_link: function called with the flat indexes of both cells of every link grown back
+    :return: None.
+    """
+    if width < 1 or height < 1 or x < 0 or y < 0 or x + width > grid.width or y + height > grid.height:
+        raise ValueError("region out of the grid")
+    cells = grid.cells
+    w = grid.width
+    area = width * height
+    steps = (-width, -1, width, 1)  # in region indexes, (ly * width + lx)
+    inner = bytearray(area)  # links to cells of the region
+    outer = bytearray(area)  # links crossing the region border
+    for ly in range(height):
+        row = (y + ly) * w + x
+        inner[ly * width:(ly + 1) * width] = cells[row:row + width]
+    border = {*range(width), *range(area - width, area), *range(0, area, width), *range(width - 1, area, width)}
+    for li in border:
+        mask = inner[li] & ((li < width) | (li % width == 0) << 1 | (li >= area - width) << 2
+                            | (li % width == width - 1) << 3)
+        outer[li] = mask
+        inner[li] ^= mask
+
+    # skeleton: a breadth first tree of every piece of the region reached from the border, pruned of the branches
+    # that lead to no border link
+    state = outer.translate(_NON_ZERO)  # 0: empty, 1: in the tree, 2: in the frontier
+    seen = bytearray(area)
+    parent = [-1] * area
+    for root in range(area):
+        if not outer[root] or seen[root]:
+            continue
+        seen[root] = 1
+        order = [root]
+        for li in order:
+            mask = inner[li]
+            if mask & 1 and not seen[li - width]:
+                seen[li - width] = 1
+                parent[li - width] = li
+                order.append(li - width)
+            if mask & 2 and not seen[li - 1]:
+                seen[li - 1] = 1
+                parent[li - 1] = li
+                order.append(li - 1)
+            if mask & 4 and not seen[li + width]:
+                seen[li + width] = 1
+                parent[li + width] = li
+                order.append(li + width)
+            if mask & 8 and not seen[li + 1]:
+                seen[li + 1] = 1
+                parent[li + 1] = li
+                order.append(li + 1)
+        for li in reversed(order):
+            if state[li] and li != root:
+                state[parent[li]] = 1
+    for li in range(area):
+        mask = outer[li]
+        lp = parent[li]
+        if state[li] and lp >= 0:
+            code = steps.index(lp - li)
+            mask |= 1 << code
+        cells[(y + li // width) * w + x + li % width] = mask
+    for li in range(area):
+        lp = parent[li]
+        if state[li] and lp >= 0:
+            cells[(y + lp // width) * w + x + lp % width] |= 1 << (steps.index(lp - li) ^ 2)
+
+    # grow the region back from the skeleton
+    rand = rng.random
+    tree = [li for li in range(area) if state[li]]
+    if not tree:  # the region is the whole labyrinth
+        start = rng.randrange(area)
+        state[start] = 1
+        tree = [start]
+    frontier: list[int] = []
+    linked: list[int] = []
+    while True:
+        for li in tree:
+            lx = li % width
+            if li >= width and not state[li - width]:
+                state[li - width] = 2
+                frontier.append(li - width)
+            if lx and not state[li - 1]:
+                state[li - 1] = 2
+                frontier.append(li - 1)
+            if li + width < area and not state[li + width]:
+                state[li + width] = 2
+                frontier.append(li + width)
+            if lx != width - 1 and not state[li + 1]:
+                state[li + 1] = 2
+                frontier.append(li + 1)
+        if not frontier:
+            break
+        k = int(rand() * len(frontier))
+        li = frontier[k]
+        frontier[k] = frontier[-1]
+        frontier.pop()
+        lx = li % width
+        linked.clear()
+        if li >= width and state[li - width] == 1:
+            linked.append(0)
+        if lx and state[li - 1] == 1:
+            linked.append(1)
+        if li + width < area and state[li + width] == 1:
+            linked.append(2)
+        if lx != width - 1 and state[li + 1] == 1:
+            linked.append(3)
+        code = linked[int(rand() * len(linked))]
+        i = (y + li // width) * w + x + lx
+        j = i + (-w, -1, w, 1)[code]
+        cells[i] |= 1 << code
+        cells[j] |= 1 << (code ^ 2)
+        state[li] = 1
+        tree = (li,)
+        if on_link is not None:
+            on_link(i, j)
+
+
+def benchmark(sides: tuple[int, ...] = (100, 500, 1000, 2000),
+              algorithms: Optional[tuple[str, ...]] = None,
+              max_seconds: float = 60) -> dict[str, dict[int, float]]:
+    """
+    times every algorithm over several labyrinth sizes. An algorithm is not run on bigger sizes once it took
+    longer than max_seconds.
+    :param sides: labyrinth sides to time
+    :param algorithms: algorithm names, all of GENERATORS if None
+    :param max_seconds: time limit after which bigger sizes are skipped
+    :return: dict of algorithm name -> {side: seconds}
+    """
+    if algorithms is None:
+        algorithms = tuple(GENERATORS)
+    results: dict[str, dict[int, float]] = {}
+    for algorithm in algorithms:
+        results[algorithm] = {}
+        for side in sides:
+            grid = MazeGrid(side)
+            start = perf_counter()
+            generate(grid, algorithm, random.Random(side))
+            results[algorithm][side] = perf_counter() - start
+            if results[algorithm][side] > max_seconds:
+                break
+    return results
+
+
+if __name__ == '__main__':
+    timings = benchmark()
+    print("side".ljust(8) + "".join(name.ljust(9) for name in timings))
+    for s in (100, 500, 1000, 2000):
+        print(str(s).ljust(8) + "".join((f"{timings[name][s]:.2f}" if s in timings[name] else "-").ljust(9)
+                                        for name in timings))
@@ -0,0 +1,312 @@
+from typing import Iterable, Optional, Union
+
+UP: int = 0
+LEFT: int = 1
+DOWN: int = 2
+RIGHT: int = 3
+
+DIRECTIONS: tuple[str, str, str, str] = ("up", "left", "down", "right")
+DIRECTION_CODES: dict[str, int] = {name: code for code, name in enumerate(DIRECTIONS)}
+OFFSETS: tuple[tuple[int, int], ...] = ((0, -1), (-1, 0), (0, 1), (1, 0))
+MASKS: tuple[int, int, int, int] = (1, 2, 4, 8)
+
+# number of open directions for every possible mask, usable as a bytes.translate table
+LINK_COUNT: bytes = bytes(bin(mask & 15).count("1") for mask in range(256))
+# direction name or code -> direction code, see encode_directions
+_CODE_OF: dict[Union[str, int], int] = {**DIRECTION_CODES, **{code: code for code in range(4)}}
+# (mask << 2 | code) -> 1 if a cell with that mask is open in that direction, usable as a bytes.translate table
+_OPEN: bytes = bytes(mask >> code & 1 for mask in range(16) for code in range(4)).ljust(256, b"\x00")
+# moves run_moves makes in a row near the stop cell before it looks again how far the stop is
+_CHECKED_RUN: int = 32
+
+
+def opposite(code: int) -> int:
+    """
+    gives the direction code opposite to code
+    :param code: a direction code, UP, LEFT, DOWN or RIGHT
+    :return: the opposite direction code
+    """
+    return code ^ 2
+
+
+class MazeGrid:
+    """
+    MazeGrid class: compact storage for a 2D labyrinth.
+    Each cell is a single byte in a flat bytearray, holding a bitmask of the directions it is open in
+    (bit 1 << UP, 1 << LEFT, 1 << DOWN, 1 << RIGHT). Cells are stored row by row: (x, y) is at y * width + x.
+    """
+    __slots__ = ("width", "height", "cells")
+
+    def __init__(self, width: int = 10, height: Optional[int] = None, cells: Optional[bytearray] = None) -> None:
+        """
+        MazeGrid class builder
+        :param width: number of cells along x
+        :param height: number of cells along y, same as width if None.
+        :param cells: pre-computed cell masks, all walls closed if None.
+        """
+        if height is None:
+            height = width
+        self.width: int = width
+        self.height: int = height
+        if cells is None:
+            cells = bytearray(width * height)
+        elif len(cells) != width * height:
+            raise ValueError("cells do not match the grid size")
+        self.cells: bytearray = cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def copy(self) -> "MazeGrid":
+        """
+        :return: an independent copy of this grid
+        """
+        return MazeGrid(self.width, self.height, bytearray(self.cells))
+
+    def index(self, pos: tuple[int, int]) -> int:
+        """
+        :param pos: tuple (x, y) of coordinates
+        :return: the flat index of the cell at pos
+        """
+        return pos[1] * self.width + pos[0]
+
+    def position(self, index: int) -> tuple[int, int]:
+        """
+        :param index: flat index of a cell
+        :return: the tuple (x, y) of coordinates of this cell
+        """
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def in_bounds(self, pos: tuple[int, int]) -> bool:
+        """
+        bounds check for grid coordinates
+        :param pos: tuple (x, y) of coordinates to check
+        :return: bool, True if in bounds.
+        """
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def step(self, index: int, code: int) -> int:
+        """
+        gets the index of the neighbour of a cell in a given direction
+        :param index: flat index of the cell
+        :param code: direction code
+        :return: the neighbour's index, or -1 if it would be out of bounds
+        """
+        x = index % self.width
+        if code == UP:
+            return index - self.width if index >= self.width else -1
+        if code == LEFT:
+            return index - 1 if x > 0 else -1
+        if code == DOWN:
+            return index + self.width if index + self.width < len(self.cells) else -1
+        return index + 1 if x < self.width - 1 else -1
+
+    def neighbour_indices(self, index: int) -> list[int]:
+        """
+        :param index: flat index of a cell
+        :return: the indexes of all in-bounds neighbours, linked or not
+        """
+        rt = []
+        for code in (UP, LEFT, DOWN, RIGHT):
+            nb = self.step(index, code)
+            if nb >= 0:
+                rt.append(nb)
+        return rt
+
+    def direction(self, index1: int, index2: int) -> int:
+        """
+        gives the direction to go in from one cell to an adjacent one
+        :param index1: flat index of the first cell
+        :param index2: flat index of the second cell, adjacent to the first one
+        :return: the direction code
+        """
+        diff = index2 - index1
+        if diff == self.width:
+            return DOWN
+        if diff == -self.width:
+            return UP
+        if diff == 1 and index2 % self.width:
+            return RIGHT
+        if diff == -1 and index1 % self.width:
+            return LEFT
+        raise ValueError("cells are not adjacent")
+
+    def open(self, index: int, code: int) -> None:
+        """
+        opens the wall of a cell in a given direction, on both sides
+        :param index: flat index of the cell
+        :param code: direction code, the neighbour must be in bounds
+        :return: None
+        """
+        nb = self.step(index, code)
+        self.cells[index] |= 1 << code
+        self.cells[nb] |= 1 << (code ^ 2)
+
+    def close(self, index: int, code: int) -> None:
+        """
+        closes the wall of a cell in a given direction, on both sides
+        :param index: flat index of the cell
+        :param code: direction code, the neighbour must be in bounds
+        :return: None
+        """
+        nb = self.step(index, code)
+        self.cells[index] &= ~(1 << code)
+        self.cells[nb] &= ~(1 << (code ^ 2))
+
+    def link(self, pos1: tuple[int, int], pos2: tuple[int, int]) -> None:
+        """
+        Links two adjacent cells
+        :param pos1: position of the first cell
+        :param pos2: position of the second cell
+        :return: None
+        """
+        index1 = self.index(pos1)
+        self.open(index1, self.direction(index1, self.index(pos2)))
+
+    def unlink(self, pos1: tuple[int, int], pos2: tuple[int, int]) -> None:
+        """
+        Removes the link between two adjacent cells
+        :param pos1: position of the first cell
+        :param pos2: position of the second cell
+        :return: None
+        """
+        index1 = self.index(pos1)
+        self.close(index1, self.direction(index1, self.index(pos2)))
+
+    def is_linked(self, pos1: tuple[int, int], pos2: tuple[int, int]) -> bool:
+        """
+        :param pos1: position of the first cell
+        :param pos2: position of the second cell
+        :return: bool, True if both cells are adjacent and linked
+        """
+        index1, index2 = self.index(pos1), self.index(pos2)
+        try:
+            code = self.direction(index1, index2)
+        except ValueError:
+            return False
+        return bool(self.cells[index1] & (1 << code))
+
+    def mask(self, pos: tuple[int, int]) -> int:
+        """
+        :param pos: tuple (x, y) of coordinates
+        :return: the open directions bitmask of the cell at pos
+        """
+        return self.cells[pos[1] * self.width + pos[0]]
+
+    def link_count(self, pos: tuple[int, int]) -> int:
+        """
+        :param pos: tuple (x, y) of coordinates
+        :return: the number of cells the cell at pos is linked to
+        """
+        return LINK_COUNT[self.cells[pos[1] * self.width + pos[0]]]
+
+    def links(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        :param pos: tuple (x, y) of coordinates
+        :return: the positions of the cells the cell at pos is linked to
+        """
+        mask = self.mask(pos)
+        return [(pos[0] + OFFSETS[code][0], pos[1] + OFFSETS[code][1])
+                for code in (UP, LEFT, DOWN, RIGHT) if mask & (1 << code)]
+
+    def get_nearby(self, pos: tuple[int, int]) -> dict[str, bool]:
+        """
+        Tells whether a cell is linked to the one above, below, to the left and to the right of itself.
+        :param pos: tuple (x, y) of coordinates
+        :return: a dict, keys are "up", "left", "down", or "right", values are bools.
+        """
+        mask = self.mask(pos)
+        return {"up": bool(mask & 1),
+                "left": bool(mask & 2),
+                "down": bool(mask & 4),
+                "right": bool(mask & 8)}
+
+
+def encode_directions(directions: Iterable[Union[str, int]]) -> bytes:
+    """
+    converts directions to direction codes
+    :param directions: iterable of direction names ("up", "left", "down", "right") or direction codes
+    :return: the direction codes, one byte each
+    """
+    if isinstance(directions, (bytes, bytearray)):
+        return bytes(directions)
+    try:
+        return bytes(map(_CODE_OF.__getitem__, directions))
+    except (KeyError, TypeError):
+        raise NameError("Invalid direction")
+
+
+def run_moves(grid: MazeGrid, index: int, codes: bytes, stop: int = -1) -> tuple[bytearray, int]:
+    """
+    moves a cursor through a grid, one direction code after the other. Moves into walls fail and leave the cursor
+    where it is.
+    Only the cursor index is kept: the (mask << 2 | code) key of every move is appended to a bytearray, and turned
+    into the results by a single translate at the end. The stop cell is only looked for when it is close: a cursor
+    d cells away from it can make d - 1 moves without reaching it, and those run in a loop that doesn't check.
+    :param grid: the labyrinth, its cells can be any bytes-like buffer, such as a read only memoryview
+    :param index: flat index of the starting cell
+    :param codes: direction codes, see encode_directions
+    :param stop: flat index of a cell at which to stop moving once a move reaches it, such as the end of the
+    labyrinth. -1 for none.
+    :return: 1 for every successful move and 0 for every failed one, up to the stop if reached, and the flat index
+    the cursor ends on
+    """
+    if not codes:
+        return bytearray(), index
+    if max(codes) > 3:
+        raise NameError("Invalid direction")
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    # offset to apply for each (mask << 2 | code): the step if the wall is open, else 0
+    offsets = [steps[code] if mask >> code & 1 else 0 for mask in range(16) for code in range(4)]
+    keys = bytearray()
+    append = keys.append
+    total = len(codes)
+    done = 0
+    while done < total:
+        if stop < 0:
+            safe = total
+        else:
+            safe = abs(index % w - stop % w) + abs(index // w - stop // w) - 1
+        if safe >= _CHECKED_RUN:
+            for code in codes[done:done + safe]:
+                key = cells[index] << 2 | code
+                append(key)
+                index += offsets[key]
+            done += safe
+            continue
+        for code in codes[done:done + _CHECKED_RUN]:
+            key = cells[index] << 2 | code
+            append(key)
+            step = offsets[key]
+            index += step
+            if step and index == stop:  # only arriving there stops, not starting on it
+                return keys.translate(_OPEN), index
+        done += _CHECKED_RUN
+    return keys.translate(_OPEN), index
+
+
+def edge_id(index1: int, index2: int, width: int) -> int:
+    """
+    numbers the link between two neighbouring cells, e.g. to record the order links are made in
+    :param index1: flat index of one cell
+    :param index2: flat index of the other cell
+    :param width: width of the grid
+    :return: twice the lowest of both indexes, plus 1 if the link is vertical
+    """
+    if index1 > index2:
+        index1, index2 = index2, index1
+    return index1 << 1 | (index2 - index1 == width)
+
+
+def edge_cells(edge: int, width: int) -> tuple[int, int]:
+    """
+    gives back the cells of a link numbered by edge_id
+    :param edge: the link number
+    :param width: width of the grid
+    :return: the flat indexes of both cells, the top or left one first
+    """
+    index = edge >> 1
+    return index, index + (width if edge & 1 else 1)
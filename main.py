@@ -1,10 +1,20 @@
-from random import randint
-import pygame_graphics as graphics
-from time import sleep
-from typing import Optional, Any, Callable
+from array import array
+from contextlib import nullcontext
+import random
+from random import shuffle
+from time import perf_counter
+from types import ModuleType
+from typing import Optional, Any, Callable, Iterable, Iterator, Union
+from grid import MazeGrid, DIRECTIONS, DIRECTION_CODES, edge_id, encode_directions, run_moves
+from backends import get_backend
+import generators
+import mazefile
+from metrics import Metrics
+from recording import MoveRecorder, OK_BIT
+import solvers
 
-draw_intermediate = True
 path: Optional[list["Cell"]] = None
+wrong_cue_duration: float = .5  # seconds the "move wrong" cue stays on screen, removed by the render loop
 
 directions_to_coordinates = {
     "up": (0, -1),
@@ -21,20 +31,36 @@ class PathError(Exception):
 
 class Cell:
     """
-    Cell class: defines a Cell that can be used for labyrinth creation, able to link itself to its neighbours.
+    Cell class: a view on one square of a MazeGrid, able to link itself to its neighbours.
     This is limited to 2D labyrinths with no diagonal movements.
+    The walls themselves are stored in the grid, so Cell objects are cheap and can be created on the fly.
     """
-    def __init__(self, coordinates: tuple[int, int] = (0, 0), links: set["Cell"] = None) -> None:
+    __slots__ = ("coordinates", "grid")
+
+    def __init__(self, coordinates: tuple[int, int], grid: MazeGrid) -> None:
         """
         Cell class builder
         :param coordinates: the coordinates of this cell. Expressed as a tuple (x, y)
-        :param links: the set of cells this one is linked to upon creation. None by default.
+        :param grid: the MazeGrid this cell is part of.
         """
-        if links is None:
-            self.links = set()
-        else:
-            self.links: set["Cell"] = links
         self.coordinates: tuple[int, int] = coordinates
+        self.grid: MazeGrid = grid
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Cell) and self.grid is other.grid and self.coordinates == other.coordinates
+
+    def __hash__(self) -> int:
+        return hash(self.coordinates)
+
+    def __repr__(self) -> str:
+        return f"Cell({self.coordinates})"
+
+    @property
+    def links(self) -> set["Cell"]:
+        """
+        :return: the set of cells this one is linked to
+        """
+        return {Cell(pos, self.grid) for pos in self.grid.links(self.coordinates)}
 
     def link_to(self, other: "Cell") -> None:
         """
@@ -42,29 +68,63 @@ class Cell:
         :param other: The Cell to link to
         :return: None
         """
-        self.links.add(other)
-        other.links.add(self)
+        self.grid.link(self.coordinates, other.coordinates)
 
     def get_nearby(self) -> dict[str:bool]:
         """
         Tells whether this Cell is linked to the one above, below, to the left and to the right of itself.
         :return: a dict, keys are "up", "left", "down", or "right", values are bools.
         """
-        rt = {"up": False,
-              "left": False,
-              "down": False,
-              "right": False}
-        for elem in self.links:
-            if change_pos(elem.coordinates, (0, 1)) == self.coordinates:
-                rt["up"] = True
-            elif change_pos(elem.coordinates, (1, 0)) == self.coordinates:
-                rt["left"] = True
-            elif change_pos(elem.coordinates, (0, -1)) == self.coordinates:
-                rt["down"] = True
-            elif change_pos(elem.coordinates, (-1, 0)) == self.coordinates:
-                rt["right"] = True
+        return self.grid.get_nearby(self.coordinates)
+
+
+class CellColumn:
+    """
+    One column of a CellTable: column[y] is the Cell at (x, y).
+    """
+    __slots__ = ("grid", "x")
+
+    def __init__(self, grid: MazeGrid, x: int) -> None:
+        self.grid: MazeGrid = grid
+        self.x: int = x
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def __getitem__(self, y: int) -> Cell:
+        if y < 0:
+            y += self.grid.height
+        if not 0 <= y < self.grid.height:
+            raise IndexError("cell index out of range")
+        return Cell((self.x, y), self.grid)
+
+    def __iter__(self) -> Iterator[Cell]:
+        for y in range(self.grid.height):
+            yield Cell((self.x, y), self.grid)
+
+
+class CellTable:
+    """
+    Table view over a MazeGrid, indexed like a list of columns: table[x][y] is the Cell at (x, y).
+    """
+    __slots__ = ("grid",)
+
+    def __init__(self, grid: MazeGrid) -> None:
+        self.grid: MazeGrid = grid
+
+    def __len__(self) -> int:
+        return self.grid.width
 
-        return rt
+    def __getitem__(self, x: int) -> CellColumn:
+        if x < 0:
+            x += self.grid.width
+        if not 0 <= x < self.grid.width:
+            raise IndexError("column index out of range")
+        return CellColumn(self.grid, x)
+
+    def __iter__(self) -> Iterator[CellColumn]:
+        for x in range(self.grid.width):
+            yield CellColumn(self.grid, x)
 
 
 def change_pos(position: tuple[int, int], diff: tuple[int, int]) -> tuple[int, int]:
@@ -87,7 +147,7 @@ def is_aligned(cell1: Cell, cell2: Cell) -> bool:
     return cell1.coordinates[0] == cell2.coordinates[0] or cell1.coordinates[1] == cell2.coordinates[1]
 
 
-def find_4th(table: list[list[Cell]], cell1: Cell, cell2: Cell, cell3: Cell) -> Cell:
+def find_4th(table: CellTable, cell1: Cell, cell2: Cell, cell3: Cell) -> Cell:
     """
     finds the fourth Cell in a square from the 3 other, regardless of what way they were entered in.
     :param table: The table containing all the cells
@@ -123,22 +183,16 @@ def find_4th(table: list[list[Cell]], cell1: Cell, cell2: Cell, cell3: Cell) ->
     return cell_rt
 
 
-def create_table(side: int = 10) -> list[list[Cell]]:
+def create_table(side: int = 10) -> CellTable:
     """
     Creates a square table, containing cells, with the right coordinates.
     :param side: The length and width of the table
-    :return: a Table containing Cell objects
+    :return: a Table containing Cell objects, backed by a MazeGrid
     """
-    cell_table: list[list[Cell]] = []
-    for x in range(side):
-        cell_table.append([])
-        for y in range(side):
-            current = Cell((x, y))
-            cell_table[x].append(current)
-    return cell_table
+    return CellTable(MazeGrid(side))
 
 
-def get_neighbours(table: list[list[Cell]], cel: Cell) -> list[Cell]:
+def get_neighbours(table: CellTable, cel: Cell) -> list[Cell]:
     """
     From an initial cell, gets all the neighbouring ones.
     :param table: Table containing all Cells
@@ -166,49 +220,46 @@ def is_in_bounds(pos: tuple[int, int], table: list[list[Any]]) -> bool:
     return pos[0] in range(len(table)) and pos[1] in range(len(table))
 
 
-def is_in_end_space(table: list[list[Cell]], elem: Cell, primary_path: list[Cell]) -> bool:
+def carve_path(table: CellTable, rng: Optional[random.Random] = None) -> list[Cell]:
     """
-    checks whether a Cell can reach the coordinates [-1, -1] in the table, without passing through the Path
-    :param table: the table in which we need to check
-    :param elem: the starting Cell
-    :param primary_path: the Path not to be crossed
-    :return: bool, True if the Cell can reach the coordinates.
+    carves a random self-avoiding Path from the coordinates [0, 0] to [-1, -1], for labyrinths with a long solution.
+    The Path is walked forward to random free neighbours. A cell it backs out of is a dead end: every free cell it
+    leads to has been tried, and none reaches the end, so it is never entered again. That keeps the end reachable
+    incrementally, without a flood fill per step, and the whole walk takes a time linear in the number of cells.
+    The Path is not linked, see link_path.
+    :param table: the table in which to carve
+    :param rng: random number generator to use, a fresh unseeded one if None
+    :return: the Path, from start to end
     """
-    checked: set[Cell] = set(primary_path)
-    target: Cell = table[-1][-1]
-    todo: set[Cell] = {elem, }
-    while len(todo) > 0:
-        current: Cell = todo.pop()
-        checked.add(current)
-        if current == target:
-            return True
-        neighbours: list[Cell] = get_neighbours(table, current)
-        for nb in neighbours:
-            if nb not in checked:
-                todo.add(nb)
-    return False
-
-
-def get_authorized(table: list[list[Cell]], primary_path: list[Cell]) -> list[tuple[int, int]]:
-    """
-    gets all the positions a Cell can be linked to next
-    :param table: the table in which to check
-    :param primary_path: the Path not to be crossed
-    :return: the list of available next moves
-    """
-    current: Cell = primary_path[-1]
-    nxt: list[tuple[int, int]] = [change_pos(current.coordinates, (0, 1)),
-                                  change_pos(current.coordinates, (1, 0)),
-                                  change_pos(current.coordinates, (0, -1)),
-                                  change_pos(current.coordinates, (-1, 0))]
-    i = 0
-    while i < len(nxt):
-        if is_in_bounds(nxt[i], table) and table[nxt[i][0]][nxt[i][1]] not in primary_path:
-            i += 1
+    if rng is None:
+        rng = random.Random()
+    rand = rng.random
+    grid = table.grid
+    w = grid.width
+    n = len(grid)
+    end = n - 1
+    tried = bytearray(n)  # on the Path, or a dead end
+    tried[0] = 1
+    stack = [0]
+    while stack[-1] != end:
+        i = stack[-1]
+        x = i % w
+        options = []
+        if i >= w and not tried[i - w]:
+            options.append(i - w)
+        if x and not tried[i - 1]:
+            options.append(i - 1)
+        if i + w < n and not tried[i + w]:
+            options.append(i + w)
+        if x != w - 1 and not tried[i + 1]:
+            options.append(i + 1)
+        if not options:
+            stack.pop()
             continue
-        else:
-            nxt.pop(i)
-    return nxt
+        j = options[int(rand() * len(options))]
+        tried[j] = 1
+        stack.append(j)
+    return [table[i % w][i // w] for i in stack]
 
 
 def randomize(lst: list[Any]) -> list[Any]:
@@ -217,67 +268,254 @@ def randomize(lst: list[Any]) -> list[Any]:
     :param lst: list to randomize
     :return: randomized list
     """
-    nu: list[Any] = []
-    lst = lst.copy()
-    while len(lst) > 0:
-        nu.append(lst.pop(randint(0, len(lst) - 1)))
+    nu: list[Any] = list(lst)
+    shuffle(nu)
     return nu
 
 
-def create_ramifications(table: list[list[Cell]]) -> None:
+def link_callback(grid: MazeGrid,
+                  graphics: Optional[ModuleType] = None,
+                  edges: Optional[array] = None,
+                  metrics: Optional[Metrics] = None) -> Optional[Callable[[int, int], None]]:
+    """
+    makes the on_link callback of a generation
+    :param grid: the grid being generated
+    :param graphics: rendering backend to draw every new link with, nothing is drawn if None.
+    :param edges: if set, array the edge_id of every new link is appended to, in order
+    :param metrics: if set, counts the links made in it
+    :return: the callback, None if there is nothing to do
+    """
+    on_link = None
+    if graphics is not None:
+        def on_link(index1: int, index2: int) -> None:
+            graphics.draw_path(grid.position(index1), grid.position(index2))
+    if edges is not None:
+        draw_link = on_link
+        append = edges.append
+        w = grid.width
+
+        def on_link(index1: int, index2: int) -> None:
+            append(edge_id(index1, index2, w))
+            if draw_link is not None:
+                draw_link(index1, index2)
+    if metrics is not None:
+        inner_link = on_link
+
+        def on_link(index1: int, index2: int) -> None:
+            metrics.count("links")
+            if inner_link is not None:
+                inner_link(index1, index2)
+    return on_link
+
+
+def create_ramifications(table: CellTable,
+                         algorithm: str = "grow",
+                         graphics: Optional[ModuleType] = None,
+                         rng: Optional[random.Random] = None,
+                         metrics: Optional[Metrics] = None,
+                         edges: Optional[array] = None) -> None:
     """
     creates ramifications for the labyrinth, links directly the Cells of the given table to one another.
     :param table: Input table, with pre-linked initial path.
+    :param algorithm: name of the generation algorithm, one of generators.GENERATORS
+    :param graphics: rendering backend to draw every new link with, nothing is drawn if None. Generation then runs
+    at the pace of the display, record edges and play them back with the backend's play_generation instead.
+    :param rng: random number generator to use, a fresh unseeded one if None
+    :param metrics: if set, counts the links made and the neighbour lookups in it, and the sweeps over the grid
+    for "sweep", the only algorithm that sweeps
+    :param edges: if set, array the edge_id of every new link is appended to, in the order they are made
     :return: None.
     """
-    empty_left = True
-    while empty_left:
-        empty_left = False
-        for line in randomize(table):
-            for cel in randomize(line):
-                if len(cel.links) == 0:
-                    empty_left = True
-                    for nb in randomize(get_neighbours(table, cel)):
-                        if len(nb.links) != 0:
-                            cel.link_to(nb)
-                            if draw_intermediate:
-                                graphics.draw_path(cel.coordinates, nb.coordinates)
-                            break
+    if metrics is not None:
+        sweeps = generators.sweep_passes
+        lookups = generators.neighbour_lookups
+    generators.generate(table.grid, algorithm, rng, link_callback(table.grid, graphics, edges, metrics))
+    if metrics is not None:
+        metrics.count("neighbour_lookups", generators.neighbour_lookups - lookups)
+        if algorithm == "sweep":
+            metrics.count("sweeps", generators.sweep_passes - sweeps)
+
+
+def braid_labyrinth(table: CellTable,
+                    density: float,
+                    graphics: Optional[ModuleType] = None,
+                    rng: Optional[random.Random] = None,
+                    metrics: Optional[Metrics] = None,
+                    edges: Optional[array] = None) -> None:
+    """
+    adds loops to a generated labyrinth, by removing dead ends.
+    :param table: Input table, a generated labyrinth.
+    :param density: share of the dead ends to remove, 0 to 1
+    :param graphics: rendering backend to draw every opened wall with, nothing is drawn if None.
+    :param rng: random number generator to use, a fresh unseeded one if None
+    :param metrics: if set, counts the opened walls as "loops" and as "links" in it
+    :param edges: if set, array the edge_id of every opened wall is appended to, in order
+    :return: None.
+    """
+    loops = generators.braid(table.grid, rng or random.Random(), density,
+                             link_callback(table.grid, graphics, edges, metrics))
+    if metrics is not None:
+        metrics.count("loops", loops)
 
 
-def link_path(primary_path: list[Cell]) -> None:
+def link_path(primary_path: list[Cell], edges: Optional[array] = None) -> None:
     """
     links the elements of a Path list to one another
     :param primary_path: the path to link
+    :param edges: if set, array the edge_id of every new link is appended to, in order
     :return: None.
     """
     for i in range(len(primary_path) - 1):
         primary_path[i].link_to(primary_path[i + 1])
+    if edges is not None and primary_path:
+        grid = primary_path[0].grid
+        indexes = [grid.index(cell.coordinates) for cell in primary_path]
+        edges.extend(edge_id(index1, index2, grid.width) for index1, index2 in zip(indexes, indexes[1:]))
 
 
 class ChallengeLabyrinth:
     """
     labyrinth class. Creates a labyrinth.
     """
-    def __init__(self, side: int = 10, dri: bool = False):
+    def __init__(self, side: int = 10,
+                 dri: bool = False,
+                 algorithm: str = "grow",
+                 backend: str = "pygame",
+                 view: int = 0,
+                 minimap: int = 0,
+                 seed: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 metrics: Optional[Metrics] = None,
+                 long_path: bool = False,
+                 braid: float = 0.):
         """
         Labyrinth class builder
         :param side: length of the labyrinth
-        :param dri: defines whether the labyrinth building process shall be drawn.
+        :param dri: defines whether the labyrinth building process shall be drawn. It is played back once the
+        labyrinth is generated, see the backend's play_generation, so generation takes the same time as without it.
+        :param algorithm: name of the generation algorithm, one of generators.GENERATORS
+        :param backend: name of the rendering backend, one of backends.BACKENDS. "null" draws nothing.
+        :param view: if set and smaller than side, only a view x view cells window following the cursor is drawn.
+        :param minimap: side in pixels of the overview drawn next to the window in view mode, 0 for none.
+        :param seed: seed of the generation, 0 to 2 ** 64 - 1. The same seed, side and algorithm always give the same
+        labyrinth. A random one is picked if None, and kept in self.seed.
+        :param cache_dir: if set, directory in which labyrinths are saved, and loaded from instead of being generated
+        again when the same side, seed and algorithm are asked for.
+        :param metrics: if set, phase timings and counters are recorded in it, see metrics.Metrics.
+        :param long_path: if set, a random self-avoiding path from start to end is carved first, and the algorithm
+        grows the ramifications around it, so that the solution is long. It is cached apart from the default mode.
+        The row by row and tiled algorithms, "eller" and "tiled", can't grow around it and raise ValueError, before
+        anything is initialised. The path is kept in self._path, which stays empty when the labyrinth is loaded from
+        the cache: in a perfect labyrinth, the path is the solution, see solve.
+        :param braid: share of the dead ends to remove once the labyrinth is generated, 0 to 1, in whole percents.
+        Every dead end removed opens a loop, see generators.braid. 0 keeps the labyrinth perfect.
         """
-        global draw_intermediate
-        draw_intermediate = dri
-        graphics.init(side)
-        self._table: list[list[Cell]] = create_table(side)
-        self._path = [self._table[0][0], self._table[0][1]]
-        link_path(self._path)
-        if dri:
-            graphics.draw_bg()
-            graphics.draw_table(self._table)
-        create_ramifications(self._table)
+        if long_path and algorithm in generators.NO_LONG_PATH:
+            raise ValueError(f"{algorithm} can't grow around a long path")
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed: int = seed
+        self.metrics: Optional[Metrics] = metrics
+        with self.phase("backend_init"):
+            self.graphics: ModuleType = get_backend(backend)
+            if metrics is not None:
+                self.graphics = metrics.instrument(self.graphics)
+            graphics = self.graphics
+            graphics.init(side, view, minimap)
+        # with dri, the links are recorded in order at full speed, then played back
+        edges = array("I") if dri else None
+        with self.phase("create_table"):
+            self._table: CellTable = create_table(side)
+            self.grid: MazeGrid = self._table.grid
+            # the long path is only carved if the labyrinth has to be generated
+            self._path = [] if long_path else [self._table[0][0], self._table[0][1]]
+            link_path(self._path, edges)
+            if metrics is not None and self._path:
+                metrics.count("links", len(self._path) - 1)
+        cached = None
+        braid = round(braid, 2)
+        cache_key = algorithm + "+long" if long_path else algorithm
+        if braid:
+            cache_key += f"+b{round(braid * 100)}"
+        if cache_dir is not None:
+            with self.phase("cache_load"):
+                cached = mazefile.cache_load(cache_dir, side, seed, cache_key)
+        if cached is not None:
+            self.grid.cells[:] = cached.cells
+            if dri:
+                with self.phase("draw"):
+                    graphics.draw_bg()
+                    graphics.draw_table(self._table)
+        else:
+            if long_path:
+                with self.phase("generation"):
+                    self._path = carve_path(self._table, random.Random(seed))
+                    link_path(self._path, edges)
+                    if metrics is not None:
+                        metrics.count("links", len(self._path) - 1)
+            with self.phase("generation"):
+                rng = random.Random(seed)
+                create_ramifications(self._table, algorithm, None, rng, metrics, edges)
+                if braid:
+                    braid_labyrinth(self._table, braid, None, rng, metrics, edges)
+            if dri:
+                with self.phase("draw"):
+                    graphics.play_generation(self._table, edges)
+            if cache_dir is not None:
+                mazefile.cache_store(cache_dir, self.grid, seed, cache_key)
+        self.algorithm: str = algorithm
+        self.long_path: bool = long_path
+        self.braid: float = braid
         self.start: Cell = self._table[0][0]
         self.end: Cell = self._table[side-1][side-1]
 
+    def phase(self, name: str) -> Any:
+        """
+        times the body of a with statement as a metrics phase, does nothing when metrics are off
+        :param name: name of the phase
+        :return: a context manager
+        """
+        return nullcontext() if self.metrics is None else self.metrics.phase(name)
+
+    def share(self) -> "SharedMaze":
+        """
+        copies the labyrinth into shared memory, to put many cursors on it, from several threads or processes.
+        The caller owns the copy and frees it with close(unlink=True).
+        :return: the shared labyrinth, with the same start and end
+        """
+        from shared import SharedMaze  # only imported when used, it loads multiprocessing
+        return SharedMaze.create(self.grid, self.grid.index(self.start.coordinates),
+                                 self.grid.index(self.end.coordinates))
+
+    def solve(self, method: str = "bfs") -> list[tuple[int, int]]:
+        """
+        finds a shortest path from start to end
+        :param method: name of the solving algorithm, one of solvers.SOLVERS
+        :return: the coordinates of the path cells, start and end included
+        """
+        with self.phase("solve"):
+            path = solvers.solve(self.grid, self.grid.index(self.start.coordinates),
+                                 self.grid.index(self.end.coordinates), method)
+        return [self.grid.position(index) for index in path]
+
+    def regenerate_region(self, x: int, y: int, width: int, height: int, seed: Optional[int] = None) -> None:
+        """
+        reshuffles a rectangular region of the labyrinth in place, in a time proportional to its area, and redraws it.
+        The links crossing the region border are kept, so whatever was reachable still is, start and end included.
+        See generators.regenerate_region.
+        :param x: x coordinate of the top left cell of the region
+        :param y: y coordinate of the top left cell of the region
+        :param width: number of cells of the region along x
+        :param height: number of cells of the region along y
+        :param seed: seed of the reshuffle, a random one if None
+        :return: None
+        """
+        with self.phase("regeneration"):
+            generators.regenerate_region(self.grid, random.Random(seed), x, y, width, height)
+        with self.phase("draw"):
+            self.graphics.draw_region(self._table, (x, y, width, height))
+            self.graphics.flush(True)
+
 
 class LabyrinthSolverAPI(ChallengeLabyrinth):
     """
@@ -289,34 +527,80 @@ class LabyrinthSolverAPI(ChallengeLabyrinth):
                  drm: bool = False,
                  log: bool = False,
                  wrong_callback: Optional[Callable] = None,
-                 win_callback: Optional[Callable] = None):
+                 win_callback: Optional[Callable] = None,
+                 algorithm: str = "grow",
+                 backend: str = "pygame",
+                 view: int = 0,
+                 minimap: int = 0,
+                 seed: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 metrics: Optional[Metrics] = None,
+                 long_path: bool = False,
+                 braid: float = 0.):
         """
         API class builder
         :param side: the length and width of the labyrinth
         :param dri: defines whether the labyrinth building process shall be drawn.
         :param drm: defines whether the labyrinth solving process shall be drawn
-        :param log: defines whether the solving process will be logged. TODO
+        :param log: defines whether the solving process will be logged: every move attempt is then recorded in
+        self.recorder, see recording.MoveRecorder, which can save it to a file to be replayed. move records in place,
+        behind a single check: 30 to 60 ns more than a 500 ns move, measured at side 500. move_many records a whole
+        batch at once. A move is recorded before the win it makes, but a win may exit the program: the default
+        win_callback exits, and so does the pygame backend's victory screen whatever the callback. To save the log of
+        a winning run, play it with the "null" or "terminal" backend and a win_callback that saves self.recorder.
         :param wrong_callback: function callback for wrong move.
         if set to none and drm is False, this will trigger a display warning.
+        :param win_callback: function callback for victory. if set to None, the program exits on victory.
+        :param algorithm: name of the generation algorithm, one of generators.GENERATORS
+        :param backend: name of the rendering backend, one of backends.BACKENDS. "null" draws nothing.
+        :param view: if set and smaller than side, only a view x view cells window following the cursor is drawn.
+        :param minimap: side in pixels of the overview drawn next to the window in view mode, 0 for none.
+        :param seed: seed of the generation, the same seed, side and algorithm always give the same labyrinth.
+        :param cache_dir: if set, directory in which generated labyrinths are cached.
+        :param metrics: if set, phase timings, counters and the moves per second are recorded in it.
+        :param long_path: if set, the labyrinth is grown around a long carved path from start to end.
+        :param braid: share of the dead ends to remove, each one opening a loop, 0 to 1.
         """
-        super().__init__(side, dri)
+        super().__init__(side, dri, algorithm, backend, view, minimap, seed, cache_dir, metrics, long_path, braid)
         if not dri:
-            graphics.draw_bg()
+            self.graphics.draw_bg()
         self.draw_movements: bool = drm
         self.position: tuple[int, int] = self.start.coordinates
-        self.near: dict[str:bool] = {}
+        self._index: int = self.grid.index(self.position)
+        self._end_index: int = self.grid.index(self.end.coordinates)
+        self._steps: tuple[int, int, int, int] = (-self.grid.width, -1, self.grid.width, 1)
+        self._mask: int = 0
         self.compute_near()
         self.win_callback = win_callback
         self.wrong_callback = wrong_callback
         self.log = log
-        graphics.draw_cell(self.position, True)
+        self.moves_made: int = 0
+        self.wrong_moves: int = 0
+        self._exit_distances: Optional[array] = None
+        self._start_distances: Optional[array] = None
+        if metrics is not None:
+            metrics.count("near_refreshes")
+            # the measured versions shadow the methods on this instance only, the default ones stay untouched
+            self.move = self._measured_move
+            self.move_many = self._measured_move_many
+        self.recorder: Optional[MoveRecorder] = None
+        self._log_append: Optional[Callable[[int], None]] = None  # move records through it, see MoveRecorder.record
+        if log:
+            self.recorder = MoveRecorder(self.grid.width, self.grid.height, self.seed, algorithm, self.long_path,
+                                         self.braid)
+            self._log_append = self.recorder.moves.append
+            # same as metrics: the logged version wraps whatever move_many this instance uses
+            self._unlogged_move_many = self.move_many
+            self.move_many = self._logged_move_many
+        self.graphics.draw_cell(self.position, True)
+        self.graphics.flush(True)
 
     def win(self) -> None:
         """
         displays a victory screen and exits
         :return: None
         """
-        graphics.display_victory()
+        self.graphics.display_victory()
         if self.win_callback is not None:
             self.win_callback()
         else:
@@ -327,7 +611,16 @@ class LabyrinthSolverAPI(ChallengeLabyrinth):
         Computes nearby cells
         :return: None
         """
-        self.near = self._table[self.position[0]][self.position[1]].get_nearby()
+        self._mask = self.grid.cells[self._index]
+
+    @property
+    def near(self) -> dict[str:bool]:
+        """
+        the directions the cursor's cell is linked in
+        :return: a dict, keys are "up", "left", "down", or "right", values are bools.
+        """
+        mask = self._mask
+        return {"up": bool(mask & 1), "left": bool(mask & 2), "down": bool(mask & 4), "right": bool(mask & 8)}
 
     def compute_win(self) -> bool:
         """
@@ -336,6 +629,92 @@ class LabyrinthSolverAPI(ChallengeLabyrinth):
         """
         return self.position == self.end.coordinates
 
+    @property
+    def exit_distances(self) -> array:
+        """
+        shortest path distance from every cell to the end, indexed like grid.cells. Computed on first use.
+        """
+        if self._exit_distances is None:
+            with self.phase("distance_fields"):
+                self._exit_distances = solvers.distance_field(self.grid, self.grid.index(self.end.coordinates))
+        return self._exit_distances
+
+    @property
+    def start_distances(self) -> array:
+        """
+        shortest path distance from the start to every cell, indexed like grid.cells. Computed on first use.
+        """
+        if self._start_distances is None:
+            with self.phase("distance_fields"):
+                self._start_distances = solvers.distance_field(self.grid, self.grid.index(self.start.coordinates))
+        return self._start_distances
+
+    def distance_to_exit(self, position: Optional[tuple[int, int]] = None) -> int:
+        """
+        :param position: tuple (x, y) of coordinates, the cursor position if None
+        :return: the length of the shortest path from position to the end, -1 if there is none
+        """
+        if position is None:
+            position = self.position
+        return self.exit_distances[position[1] * self.grid.width + position[0]]
+
+    def distance_from_start(self, position: Optional[tuple[int, int]] = None) -> int:
+        """
+        :param position: tuple (x, y) of coordinates, the cursor position if None
+        :return: the length of the shortest path from the start to position, -1 if there is none
+        """
+        if position is None:
+            position = self.position
+        return self.start_distances[position[1] * self.grid.width + position[0]]
+
+    def best_direction(self, position: Optional[tuple[int, int]] = None) -> Optional[str]:
+        """
+        gives the first move of a shortest path to the end
+        :param position: tuple (x, y) of coordinates, the cursor position if None
+        :return: "up", "left", "down" or "right", None if position is the end or can't reach it
+        """
+        if position is None:
+            position = self.position
+        distances = self.exit_distances
+        index = self.grid.index(position)
+        if distances[index] <= 0:
+            return None
+        mask = self.grid.cells[index]
+        for code, name in enumerate(DIRECTIONS):
+            if mask >> code & 1 and distances[self.grid.step(index, code)] == distances[index] - 1:
+                return name
+        return None
+
+    def suboptimality(self) -> float:
+        """
+        scores the run so far against the shortest solution
+        :return: successful moves made divided by the shortest start to end distance, 1.0 for an optimal run
+        """
+        optimal = self.distance_from_start(self.end.coordinates)
+        if optimal <= 0:
+            return 1.0
+        return self.moves_made / optimal
+
+    def regenerate_region(self, x: int, y: int, width: int, height: int, seed: Optional[int] = None) -> None:
+        """
+        reshuffles a rectangular region of the labyrinth, see ChallengeLabyrinth.regenerate_region. The cursor stays
+        where it is, even inside the region, and the distance fields are computed again on their next use.
+        :param x: x coordinate of the top left cell of the region
+        :param y: y coordinate of the top left cell of the region
+        :param width: number of cells of the region along x
+        :param height: number of cells of the region along y
+        :param seed: seed of the reshuffle, a random one if None
+        :return: None
+        """
+        super().regenerate_region(x, y, width, height, seed)
+        self._exit_distances = None
+        self._start_distances = None
+        self.compute_near()
+        if self.metrics is not None:
+            self.metrics.count("near_refreshes")
+        if x <= self.position[0] < x + width and y <= self.position[1] < y + height:
+            self.graphics.draw_cell(self.position, True)
+
     def move(self, direction: str) -> bool:
         """
         Moves the cursor in the specified direction
@@ -347,36 +726,101 @@ class LabyrinthSolverAPI(ChallengeLabyrinth):
         else:
             wait = False
         if self.draw_movements:
-            graphics.draw_cell(self.position)
-        if direction not in ("up", "left", "down", "right"):
+            self.graphics.draw_cell(self.position)
+        code = DIRECTION_CODES.get(direction)
+        if code is None:
             raise NameError("Invalid direction")
-        if self.near[direction] is False:
+        if not self._mask >> code & 1:
+            if self._log_append is not None:
+                self._log_append(code)
             if self.draw_movements:
-                graphics.draw_cell(self.position, True)
+                self.graphics.draw_cell(self.position, True)
                 if wait:
-                    graphics.draw_wrong()
-                    sleep(.5)
-                    graphics.un_draw_wrong()
+                    self.graphics.draw_wrong(wrong_cue_duration)
                 else:
                     self.wrong_callback()
+            self.wrong_moves += 1
             return False
         else:
+            if self._log_append is not None:
+                self._log_append(code | OK_BIT)
+            self.moves_made += 1
+            self._index += self._steps[code]
             self.position = change_pos(self.position, directions_to_coordinates[direction])
             self.compute_near()
             if self.draw_movements:
-                graphics.draw_cell(self.position, True)
-            if self.compute_win():
+                self.graphics.follow(self.position)
+                self.graphics.draw_cell(self.position, True)
+            if self._index == self._end_index:
                 self.win()
-            # graphics.draw_table(self._table, {self._table[self.position[0]][self.position[1]]})
-            # uncomment for terminal UI
             return True
 
+    def move_many(self, directions: Iterable[Union[str, int]]) -> tuple[bytearray, tuple[int, int]]:
+        """
+        Moves the cursor along a whole sequence of directions in one call, stopping early if the end is reached.
+        Unless drm is set, nothing is drawn and the moves are run on the grid masks directly, see grid.run_moves:
+        about 4 times as many moves per second as calling move for each direction from codes, 3 times from names.
+        :param directions: iterable of directions, names ("up", "left", "down", "right") or codes (grid.UP, ...)
+        :return: a bytearray holding 1 for every successful move and 0 for every failed one, and the final position
+        """
+        codes = encode_directions(directions)
+        if self.draw_movements:
+            results = bytearray()
+            for code in codes:
+                if code > 3:
+                    raise NameError("Invalid direction")
+                results.append(self.move(DIRECTIONS[code]))
+                if self._index == self._end_index:
+                    break
+            return results, self.position
+        results, self._index = run_moves(self.grid, self._index, codes, self._end_index)
+        successes = results.count(1)
+        self.moves_made += successes
+        self.wrong_moves += len(results) - successes
+        self.position = self.grid.position(self._index)
+        self.compute_near()
+        if self._index == self._end_index and successes:
+            self.win()
+        return results, self.position
+
+    def _measured_move(self, direction: str) -> bool:
+        """
+        move, timed and counted in self.metrics
+        """
+        start = perf_counter()
+        moved = LabyrinthSolverAPI.move(self, direction)
+        self.metrics.add_time("moves", perf_counter() - start)
+        self.metrics.count("moves")
+        self.metrics.count("near_refreshes" if moved else "wrong_moves")
+        return moved
+
+    def _measured_move_many(self, directions: Iterable[Union[str, int]]) -> tuple[bytearray, tuple[int, int]]:
+        """
+        move_many, timed and counted in self.metrics
+        """
+        if self.draw_movements:  # made of calls to move, which are measured already
+            return LabyrinthSolverAPI.move_many(self, directions)
+        start = perf_counter()
+        results, position = LabyrinthSolverAPI.move_many(self, directions)
+        self.metrics.add_time("moves", perf_counter() - start)
+        successes = results.count(1)
+        self.metrics.count("moves", len(results))
+        self.metrics.count("wrong_moves", len(results) - successes)
+        self.metrics.count("near_refreshes")
+        return results, position
+
+    def _logged_move_many(self, directions: Iterable[Union[str, int]]) -> tuple[bytearray, tuple[int, int]]:
+        """
+        move_many, recorded in self.recorder
+        """
+        if self.draw_movements:  # made of calls to move, which are recorded already
+            return self._unlogged_move_many(directions)
+        codes = encode_directions(directions)
+        results, position = self._unlogged_move_many(codes)
+        self.recorder.record_many(codes, results)
+        return results, position
+
 
 if __name__ == "__main__":
     Labyrinth = LabyrinthSolverAPI(34, True, True)
-    while 1:
-        for event in graphics.pygame.event.get():
-            if event.type == graphics.pygame.QUIT:
-                graphics.pygame.quit()
-                exit(0)
-        graphics.pygame.display.flip()
+    Labyrinth.graphics.loop()
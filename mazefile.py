@@ -0,0 +1,298 @@
+"""
+Compact labyrinth files.
+
+A labyrinth is stored as a 40 bytes header followed by 2 bits per cell: bit 0 is set if the cell is open to the
+right, bit 1 if it is open downwards. Left and up openness are those of the neighbours, so they are not stored.
+Cells are packed 4 per byte, row by row, the first cell in the low bits. A 1000 x 1000 labyrinth takes 250 KB.
+
+Header, little endian: magic b"LABY", format version (1 byte), 3 padding bytes, width and height (unsigned 32 bits),
+seed (unsigned 64 bits) and the generation algorithm name (16 bytes, NUL padded).
+
+save_rows writes a labyrinth streamed row by row, such as generators.eller_rows, as its rows come, so labyrinths
+bigger than the memory can be made.
+MappedMaze reads a file through mmap, so a few cells can be looked up without reading the rest, and load decodes
+the whole grid with table lookups and big integer arithmetic instead of a Python loop per cell.
+The cache functions store labyrinths under the hash of (side, seed, algorithm), so a given labyrinth is only ever
+generated once. Algorithm names longer than the 16 bytes of the header are stored as a hash of the name.
+"""
+import hashlib
+import mmap
+import operator
+import os
+import struct
+from typing import Iterable, Optional
+from grid import MazeGrid, MASKS, UP, LEFT, DOWN, RIGHT
+
+MAGIC: bytes = b"LABY"
+VERSION: int = 1
+HEADER = struct.Struct("<4sB3xIIQ16s")
+NAME_SIZE: int = 16  # bytes of the algorithm name in the header
+
+# mask -> 2 bits code, and 2 bits code -> right / down mask bits
+_PACK: bytes = bytes((mask >> RIGHT & 1) | (mask >> DOWN & 1) << 1 for mask in range(256))
+_SHIFTS: tuple[bytes, ...] = tuple(bytes((code & 3) << shift for code in range(256)) for shift in (0, 2, 4, 6))
+_UNPACK: list[bytes] = [bytes((byte >> shift & 1) * MASKS[RIGHT] | (byte >> shift + 1 & 1) * MASKS[DOWN]
+                              for shift in (0, 2, 4, 6)) for byte in range(256)]
+# right / down mask bits -> the left / up bits they give the next cell along x / y
+_RIGHT_TO_LEFT: bytes = bytes(MASKS[LEFT] if mask & MASKS[RIGHT] else 0 for mask in range(256))
+_DOWN_TO_UP: bytes = bytes(MASKS[UP] if mask & MASKS[DOWN] else 0 for mask in range(256))
+
+
+def packed_size(width: int, height: int) -> int:
+    """
+    :param width: number of cells along x
+    :param height: number of cells along y
+    :return: the size in bytes of the packed cells, header excluded
+    """
+    return -(-width * height // 4)
+
+
+def _pack_codes(codes: bytes) -> bytes:
+    """
+    :param codes: 2 bits codes of cells, see _PACK, a multiple of 4 of them
+    :return: the codes packed 4 per byte
+    """
+    quarters = [codes[k::4].translate(_SHIFTS[k]) for k in range(4)]
+    return bytes(map(operator.or_, map(operator.or_, quarters[0], quarters[1]),
+                     map(operator.or_, quarters[2], quarters[3])))
+
+
+def pack(grid: MazeGrid) -> bytes:
+    """
+    encodes the cells of a grid, 2 bits per cell
+    :param grid: the labyrinth
+    :return: the packed cells
+    """
+    return _pack_codes(grid.cells.translate(_PACK) + bytes(-len(grid.cells) % 4))
+
+
+def unpack(data: bytes, width: int, height: int) -> MazeGrid:
+    """
+    decodes packed cells back into a grid, restoring the left and up bits from the neighbours
+    :param data: the packed cells, see pack
+    :param width: number of cells along x
+    :param height: number of cells along y
+    :return: the labyrinth
+    """
+    n = width * height
+    size = packed_size(width, height)
+    if len(data) < size:
+        raise ValueError("truncated labyrinth data")
+    right_down = b"".join(map(_UNPACK.__getitem__, data[:size]))[:n]
+    left = (b"\x00" + right_down[:-1]).translate(_RIGHT_TO_LEFT)
+    up = (bytes(width) + right_down[:-width]).translate(_DOWN_TO_UP)
+    # the three masks have no bit in common, so adding them as big integers ors them byte by byte
+    total = sum(int.from_bytes(part, "little") for part in (right_down, left, up))
+    return MazeGrid(width, height, bytearray(total.to_bytes(n, "little")))
+
+
+def _header(width: int, height: int, seed: int, algorithm: str) -> bytes:
+    """
+    :param width: number of cells along x
+    :param height: number of cells along y
+    :param seed: seed the labyrinth was generated with, 0 to 2 ** 64 - 1
+    :param algorithm: name of the algorithm it was generated with, at most 16 ASCII characters
+    :return: the header of a labyrinth file
+    """
+    name = algorithm.encode("ascii")
+    if len(name) > NAME_SIZE:
+        raise ValueError(f"algorithm name longer than {NAME_SIZE} characters: {algorithm}")
+    return HEADER.pack(MAGIC, VERSION, width, height, seed, name)
+
+
+def encode(grid: MazeGrid, seed: int = 0, algorithm: str = "") -> bytes:
+    """
+    encodes a labyrinth as the content of a labyrinth file
+    :param grid: the labyrinth
+    :param seed: seed the labyrinth was generated with, 0 to 2 ** 64 - 1
+    :param algorithm: name of the algorithm it was generated with, at most 16 ASCII characters
+    :return: the header followed by the packed cells
+    """
+    return _header(grid.width, grid.height, seed, algorithm) + pack(grid)
+
+
+def save(grid: MazeGrid, path: str, seed: int = 0, algorithm: str = "") -> None:
+    """
+    writes a labyrinth file. The file is written next to path then renamed, so readers never see it half written.
+    :param grid: the labyrinth
+    :param path: the file to write
+    :param seed: seed the labyrinth was generated with, 0 to 2 ** 64 - 1
+    :param algorithm: name of the algorithm it was generated with, at most 16 ASCII characters
+    :return: None
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(encode(grid, seed, algorithm))
+    os.replace(temporary, path)
+
+
+def save_rows(path: str,
+              width: int,
+              height: int,
+              rows: Iterable[bytes],
+              seed: int = 0,
+              algorithm: str = "") -> None:
+    """
+    writes a labyrinth file from a labyrinth streamed row by row, packing and writing every row as it comes. Only
+    the current row is held in memory. Like save, the file is written next to path then renamed.
+    :param path: the file to write
+    :param width: number of cells in a row
+    :param height: number of rows
+    :param rows: iterable of height rows of width cell masks, such as generators.eller_rows
+    :param seed: seed the labyrinth was generated with, 0 to 2 ** 64 - 1
+    :param algorithm: name of the algorithm it was generated with, at most 16 ASCII characters
+    :return: None
+    """
+    header = _header(width, height, seed, algorithm)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as file:
+            file.write(header)
+            left = b""  # codes of the last cells of the previous rows, that don't fill a byte yet
+            count = 0
+            for row in rows:
+                if len(row) != width or count == height:
+                    raise ValueError("rows do not match the labyrinth size")
+                count += 1
+                codes = left + row.translate(_PACK)
+                full = len(codes) - len(codes) % 4
+                file.write(_pack_codes(codes[:full]))
+                left = codes[full:]
+            if count != height:
+                raise ValueError("rows do not match the labyrinth size")
+            if left:
+                file.write(_pack_codes(left + bytes(-len(left) % 4)))
+    except BaseException:
+        os.remove(temporary)
+        raise
+    os.replace(temporary, path)
+
+
+class MappedMaze:
+    """
+    MappedMaze class: read only view of a labyrinth file, mapped in memory. Only the header is read when opening,
+    cells are decoded when they are looked up.
+    """
+    def __init__(self, path: str, offset: int = 0) -> None:
+        """
+        MappedMaze class builder
+        :param path: the labyrinth file to open
+        :param offset: position of the labyrinth in the file, for files holding several of them back to back
+        """
+        with open(path, "rb") as file:
+            self.data: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < offset + HEADER.size:
+            self.data.close()
+            raise ValueError("not a labyrinth file")
+        magic, version, width, height, seed, algorithm = HEADER.unpack_from(self.data, offset)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("not a labyrinth file")
+        self.width: int = width
+        self.height: int = height
+        self.seed: int = seed
+        self.algorithm: str = algorithm.rstrip(b"\x00").decode("ascii")
+        self.start: int = offset + HEADER.size  # position of the packed cells
+
+    def __enter__(self) -> "MappedMaze":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        unmaps the file
+        """
+        self.data.close()
+
+    def _right_down(self, index: int) -> int:
+        """
+        :param index: flat index of a cell
+        :return: the right and down bits of the cell, as mask bits
+        """
+        return _UNPACK[self.data[self.start + (index >> 2)]][index & 3]
+
+    def mask(self, pos: tuple[int, int]) -> int:
+        """
+        :param pos: tuple (x, y) of coordinates
+        :return: the open directions bitmask of the cell at pos, as in MazeGrid
+        """
+        index = pos[1] * self.width + pos[0]
+        mask = self._right_down(index)
+        if pos[0] > 0:
+            mask |= _RIGHT_TO_LEFT[self._right_down(index - 1)]
+        if pos[1] > 0:
+            mask |= _DOWN_TO_UP[self._right_down(index - self.width)]
+        return mask
+
+    def to_grid(self) -> MazeGrid:
+        """
+        decodes the whole labyrinth
+        :return: the labyrinth, as a new MazeGrid
+        """
+        return unpack(self.data[self.start:self.start + packed_size(self.width, self.height)], self.width, self.height)
+
+
+def load(path: str) -> MazeGrid:
+    """
+    reads a labyrinth file
+    :param path: the file to read
+    :return: the labyrinth
+    """
+    with MappedMaze(path) as maze:
+        return maze.to_grid()
+
+
+def cache_path(cache_dir: str, side: int, seed: int, algorithm: str) -> str:
+    """
+    :param cache_dir: the cache directory
+    :param side: side of the labyrinth
+    :param seed: seed it was generated with
+    :param algorithm: name of the algorithm it was generated with
+    :return: the file the labyrinth is cached in, named after the hash of its parameters
+    """
+    key = hashlib.sha256(f"{side}:{seed}:{algorithm}".encode()).hexdigest()
+    return os.path.join(cache_dir, key + ".laby")
+
+
+def cache_label(algorithm: str) -> str:
+    """
+    :param algorithm: name of the algorithm a labyrinth was generated with, of any length
+    :return: the name stored in its cache file header: the name itself if it fits, else "#" and 15 hexadecimal
+    digits of its hash
+    """
+    if len(algorithm) <= NAME_SIZE and algorithm.isascii():
+        return algorithm
+    return "#" + hashlib.sha256(algorithm.encode()).hexdigest()[:NAME_SIZE - 1]
+
+
+def cache_load(cache_dir: str, side: int, seed: int, algorithm: str) -> Optional[MazeGrid]:
+    """
+    looks a labyrinth up in the cache
+    :param cache_dir: the cache directory
+    :param side: side of the labyrinth
+    :param seed: seed it was generated with
+    :param algorithm: name of the algorithm it was generated with
+    :return: the labyrinth, or None if it isn't cached
+    """
+    try:
+        with MappedMaze(cache_path(cache_dir, side, seed, algorithm)) as maze:
+            if (maze.width, maze.height, maze.seed, maze.algorithm) != (side, side, seed, cache_label(algorithm)):
+                return None
+            return maze.to_grid()
+    except (OSError, ValueError):
+        return None
+
+
+def cache_store(cache_dir: str, grid: MazeGrid, seed: int, algorithm: str) -> None:
+    """
+    stores a square labyrinth in the cache
+    :param cache_dir: the cache directory, created if needed
+    :param grid: the labyrinth
+    :param seed: seed it was generated with
+    :param algorithm: name of the algorithm it was generated with
+    :return: None
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    save(grid, cache_path(cache_dir, grid.width, seed, algorithm), seed, cache_label(algorithm))
@@ -0,0 +1,151 @@
+"""
+Opt-in instrumentation of ChallengeLabyrinth and LabyrinthSolverAPI.
+
+Pass a Metrics object as their metrics argument to record per-phase wall times and counters:
+
+    phases: create_table, backend_init, generation, cache_load, draw, solve, distance_fields, moves, regeneration
+    counters: links, sweeps, loops, neighbour_lookups, near_refreshes, moves, wrong_moves, draw_calls, one per backend
+    function called, and display_updates, the number of times the backend sent pixels to the display.
+    sweeps are the passes over the grid of the "sweep" algorithm, only counted with it. neighbour_lookups are the
+    cells whose neighbours the generation looked up, see generators.neighbour_lookups. near_refreshes are the times
+    the open neighbours of the cursor are computed again: once at start, after every successful move, every
+    move_many batch and every regenerated region.
+
+Nothing is measured without a Metrics object: the instrumented code paths are only swapped in when one is given,
+so the default ones are left as they are. Hooks are called on every phase end and counter change, e.g. to forward
+them to a monitoring system, and snapshot() gives everything as a JSON-able dict.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+from types import ModuleType
+from typing import Any, Callable, Iterator, Optional
+
+
+class Metrics:
+    """
+    Metrics class: accumulates phase timings and counters, and calls hooks when they change.
+    """
+    def __init__(self) -> None:
+        """
+        Metrics class builder
+        """
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.hooks: dict[str, list[Callable[[str, float], None]]] = {}
+        self.backend: Optional[ModuleType] = None
+        self._display_updates_start: int = 0
+
+    def on(self, name: str, callback: Callable[[str, float], None]) -> None:
+        """
+        registers a hook
+        :param name: name of the phase or counter to watch, "*" for all of them
+        :param callback: function called with the name and the phase duration in seconds or the new counter value
+        :return: None
+        """
+        self.hooks.setdefault(name, []).append(callback)
+
+    def _fire(self, name: str, value: float) -> None:
+        for callback in self.hooks.get(name, ()):
+            callback(name, value)
+        for callback in self.hooks.get("*", ()):
+            callback(name, value)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        adds time spent in a phase
+        :param name: name of the phase
+        :param seconds: time spent
+        :return: None
+        """
+        self.phases[name] = self.phases.get(name, 0.) + seconds
+        if self.hooks:
+            self._fire(name, seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        times the body of a with statement as part of a phase
+        :param name: name of the phase
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        increments a counter
+        :param name: name of the counter
+        :param n: amount to add
+        :return: None
+        """
+        value = self.counters.get(name, 0) + n
+        self.counters[name] = value
+        if self.hooks:
+            self._fire(name, value)
+
+    def instrument(self, backend: ModuleType) -> "InstrumentedBackend":
+        """
+        wraps a rendering backend so that its calls are counted
+        :param backend: the backend module
+        :return: a stand-in for the backend, with the same functions
+        """
+        self.backend = backend
+        self._display_updates_start = getattr(backend, "display_updates", 0)
+        return InstrumentedBackend(backend, self)
+
+    @property
+    def display_updates(self) -> int:
+        """
+        :return: the number of display updates made by the instrumented backend since it was instrumented
+        """
+        if self.backend is None:
+            return 0
+        return getattr(self.backend, "display_updates", 0) - self._display_updates_start
+
+    def moves_per_second(self) -> float:
+        """
+        :return: the moves made per second spent moving, 0.0 before the first move
+        """
+        seconds = self.phases.get("moves", 0.)
+        return self.counters.get("moves", 0) / seconds if seconds else 0.
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        :return: all the metrics, as a dict of plain values
+        """
+        counters = dict(self.counters)
+        counters["display_updates"] = self.display_updates
+        return {"phases": dict(self.phases), "counters": counters, "moves_per_second": self.moves_per_second()}
+
+
+class InstrumentedBackend:
+    """
+    Stand-in for a rendering backend module, counting the calls made to its functions. Every drawing function also
+    counts as a draw call.
+    """
+    def __init__(self, backend: ModuleType, metrics: Metrics) -> None:
+        """
+        InstrumentedBackend class builder
+        :param backend: the backend module
+        :param metrics: the metrics to count the calls in
+        """
+        self.backend: ModuleType = backend
+        self.metrics: Metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.backend, name)
+        if not callable(attribute) or name.startswith("_"):
+            return attribute
+        metrics = self.metrics
+        is_draw = name.startswith("draw_")
+
+        def counted(*args: Any, **kwargs: Any) -> Any:
+            metrics.count(name)
+            if is_draw:
+                metrics.count("draw_calls")
+            return attribute(*args, **kwargs)
+
+        setattr(self, name, counted)  # looked up directly from now on
+        return counted
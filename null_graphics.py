@@ -0,0 +1,101 @@
+from typing import Optional, Any
+
+
+def init(n_cells: int, view: int = 0, minimap: int = 0) -> None:
+    pass
+
+
+def loop() -> None:
+    pass
+
+
+def flush(force: bool = False) -> None:
+    """
+    sends pending drawings to the display
+    :param force: if True, even if the last update was less than a frame ago
+    """
+    pass
+
+
+def follow(pos: tuple[int, int]) -> None:
+    """
+    scrolls the camera viewport to follow the cursor
+    :param pos: tuple of table positions, (x, y) of the cursor
+    """
+    pass
+
+
+def draw_bg() -> None:
+    """
+    draws the background on top of the image
+    """
+    pass
+
+
+def draw_cell(pos: tuple[int, int], toggle_accent: bool = False, update_display: bool = True) -> None:
+    """
+    draws the cell at position pos, in accent color if toggle accent else in normal colour
+    :param pos: tuple of table positions, (x, y)
+    :param toggle_accent: if True, uses accent color
+    :param update_display: Determines if the display should be updated after drawing
+    """
+    pass
+
+
+def draw_path(pos1: tuple[int, int], pos2: tuple[int, int]) -> None:
+    """
+    draws the path between pos1 and pos2, in table coordinates
+    :param pos1: position of the first Cell
+    :param pos2: position of the second Cell
+    """
+    pass
+
+
+def draw_table(table: Any, accents: Optional[set[Any]] = None) -> None:
+    """
+    draws the whole table from the list of cells
+    :param table: The table to draw
+    :param accents: set of cells to draw accentuated
+    """
+    pass
+
+
+def play_generation(table: Any, edges: Any, per_frame: int = 0) -> None:
+    """
+    animates the generation of a labyrinth from the order its links were made in
+    :param table: the generated table
+    :param edges: edge_id of the links made by the generation, in order
+    :param per_frame: links drawn per frame
+    """
+    pass
+
+
+def draw_region(table: Any, region: tuple[int, int, int, int]) -> None:
+    """
+    draws again a rectangular region of the table, after it changed
+    :param table: The table to draw
+    :param region: tuple (x, y, width, height) of the region, in cells
+    """
+    pass
+
+
+def draw_wrong(duration: float = 0.) -> None:
+    """
+    draws a "move wrong" cue
+    :param duration: if set, seconds after which the cue is removed
+    """
+    pass
+
+
+def un_draw_wrong() -> None:
+    """
+    removes the "move wrong" cue
+    """
+    pass
+
+
+def display_victory() -> None:
+    """
+    displays a victory screen
+    """
+    pass
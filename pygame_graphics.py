@@ -1,6 +1,17 @@
-from typing import Optional, Any
+import heapq
+import math
+import threading
+from array import array
+from itertools import count
+from typing import Optional, Any, Callable
 import pygame
-from time import sleep
+from time import sleep, perf_counter
+from backends import reveal_region
+from grid import MazeGrid, MASKS, DOWN, RIGHT, edge_cells
+try:
+    import raster
+except ImportError:  # NumPy missing, draw_table falls back to drawing cell by cell
+    raster = None
 
 BACKGROUND_COLOUR: pygame.color.Color = pygame.color.Color(4, 4, 4)
 CELL_COLOUR: pygame.color.Color = pygame.color.Color(4, 255, 4)
@@ -13,6 +24,32 @@ wrong_cue_size = 60
 init_done: bool = False
 screen: Optional[pygame.Surface]
 
+# camera mode: only a view_cells x view_cells window of the labyrinth is on screen, scrolled to follow the cursor.
+# What has been drawn is remembered cell by cell, so the window can be repainted when it scrolls, and so that
+# draw_region never shows more than was shown before.
+n_shown: int = 0
+view_cells: int = 0
+view_origin: tuple[int, int] = (0, 0)
+shown_cells: bytearray = bytearray()  # 0 not drawn, 1 drawn, 2 drawn in accent colour
+shown_links: bytearray = bytearray()  # right and down link bits drawn for every cell
+minimap_size: int = 0
+
+max_fps: int = 60  # display updates per second, 0 to update after every drawing
+edges_per_frame: int = 0  # links drawn per frame by play_generation, 0 to fit the whole playback in playback_seconds
+playback_seconds: float = 5.
+max_dirty_rects: int = 256  # above this, pending rects are merged into their bounding rect
+dirty_rects: list[pygame.Rect] = []
+last_flush: float = 0.
+display_updates: int = 0  # number of display updates made, read by metrics
+
+# timed events, run by run_scheduled() from loop() and flush(), so that nothing has to sleep.
+scheduled: list[list[Any]] = []  # heap of [due time, order, function], function is None once cancelled
+schedule_order = count()
+# guards scheduled and dirty_rects, which a thread driving the API and the one running loop() both change.
+# Scheduled functions and display updates run outside of it.
+state_lock: threading.Lock = threading.Lock()
+wrong_cue_event: Optional[list[Any]] = None
+
 
 def translate(pt: tuple[int, int], matrix: tuple[int, int]) -> tuple[int, int]:
     return pt[0]+matrix[0], pt[1]+matrix[1]
@@ -50,74 +87,191 @@ wrong_cross_points: list[tuple[int, int]] = [WRONG_CROSS_RECT.topleft,
                                                        (int((wrong_cue_size-wall_size)/6), 0))]
 
 
-def init(n_cells: int) -> None:
-    global init_done, screen
-    size_x = n_cells * (cell_size + wall_size) + wall_size + wrong_cue_size
-    size_y = n_cells * (cell_size + wall_size) + wall_size
+def init(n_cells: int, view: int = 0, minimap: int = 0) -> None:
+    """
+    opens the window
+    :param n_cells: side of the labyrinth, in cells
+    :param view: if set and smaller than n_cells, side of the camera viewport in cells. The window is then sized for
+    the viewport instead of the whole labyrinth, and follow() scrolls it.
+    :param minimap: in camera mode, side in pixels of a downsampled overview drawn under the "move wrong" cue.
+    """
+    global init_done, screen, n_shown, view_cells, view_origin, shown_cells, shown_links, minimap_size, display_updates
+    n_shown = n_cells
+    view_cells = view if 0 < view < n_cells else 0
+    view_origin = (0, 0)
+    shown_cells = bytearray(n_cells * n_cells)
+    shown_links = bytearray(n_cells * n_cells)
+    if view_cells:
+        minimap_size = minimap if raster is not None else 0
+    maze_size = (view_cells or n_cells) * (cell_size + wall_size) + wall_size
+    size_x = maze_size + max(wrong_cue_size, minimap_size)
+    size_y = max(maze_size, wrong_cue_size + minimap_size)
     pygame.init()
     screen = pygame.display.set_mode((size_x, size_y))
     init_done = True
     pygame.display.update()
+    display_updates += 1
 
 
 def loop():
+    clock = pygame.time.Clock()
     while 1:
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
                 exit(0)
-        pygame.display.update()
+        run_scheduled()
+        flush(True)
+        clock.tick(max_fps)
+
+
+def schedule(delay: float, function: Callable[[], Any]) -> list[Any]:
+    """
+    plans a function call without blocking, it is run by the first loop() frame or flush() after the delay
+    :param delay: seconds to wait before calling function
+    :param function: the function to call, without arguments
+    :return: the event, to pass to cancel
+    """
+    event = [perf_counter() + delay, next(schedule_order), function]
+    with state_lock:
+        heapq.heappush(scheduled, event)
+    return event
+
+
+def cancel(event: list[Any]) -> None:
+    """
+    cancels a scheduled call, does nothing if it already ran
+    :param event: the event returned by schedule
+    """
+    event[2] = None
+
+
+def run_scheduled() -> None:
+    """
+    calls the scheduled functions that are due
+    """
+    now = perf_counter()
+    while True:
+        with state_lock:
+            if not scheduled or scheduled[0][0] > now:
+                return
+            function = heapq.heappop(scheduled)[2]
+        if function is not None:
+            function()
+
+
+def mark_dirty(rect: pygame.Rect) -> None:
+    """
+    records a part of the screen that changed and must be sent to the display on the next flush
+    :param rect: the changed area
+    """
+    with state_lock:
+        dirty_rects.append(rect)
+        if len(dirty_rects) > max_dirty_rects:
+            dirty_rects[:] = [dirty_rects[0].unionall(dirty_rects[1:])]
+
+
+def flush(force: bool = False) -> None:
+    """
+    sends the dirty parts of the screen to the display, at most max_fps times per second
+    :param force: if True, updates the display even if the last update was less than a frame ago
+    """
+    global last_flush, display_updates
+    if scheduled:
+        run_scheduled()
+    if not dirty_rects:
+        return
+    now = perf_counter()
+    if not force and max_fps and now - last_flush < 1 / max_fps:
+        return
+    with state_lock:  # rects marked during the update are kept for the next flush
+        rects = dirty_rects[:]
+        dirty_rects.clear()
+    pygame.display.update(rects)
+    display_updates += 1
+    last_flush = now
 
 
 def draw_bg() -> None:
     """
     draws the background on top of the image
     """
-    screen.fill(BACKGROUND_COLOUR)
-    pygame.display.update()
+    shown_cells[:] = bytes(len(shown_cells))
+    shown_links[:] = bytes(len(shown_links))
+    mark_dirty(screen.fill(BACKGROUND_COLOUR))
+    flush(True)
 
 
 def draw_cell_links(cell: Any) -> None:
-    for nb in cell.links:
-        draw_path(cell.coordinates, nb.coordinates)
+    mask = cell.grid.mask(cell.coordinates)
+    x, y = cell.coordinates
+    if mask & MASKS[RIGHT]:
+        draw_path((x, y), (x + 1, y))
+    if mask & MASKS[DOWN]:
+        draw_path((x, y), (x, y + 1))
+
+
+def is_visible(pos: tuple[int, int]) -> bool:
+    """
+    :param pos: tuple of table positions, (x, y)
+    :return: bool, True if the cell is inside the camera viewport, always True outside camera mode
+    """
+    if not view_cells:
+        return True
+    return 0 <= pos[0] - view_origin[0] < view_cells and 0 <= pos[1] - view_origin[1] < view_cells
 
 
 def draw_cell(pos: tuple[int, int], toggle_accent: bool = False, update_display: bool = True) -> None:
     """
     draws the cell at position pos, in accent color if toggle accent else in normal colour
     pos is the tuple of table coordinates
-    Not implemented on text version of the UI because not feasible with this input data
-    and my limited terminal manipulation knowledge.
     :param pos: tuple of table positions, (x, y)
     :param toggle_accent: if True, uses accent color
     :param update_display: Determines if the display should be updated after drawing
     """
-    pygame.draw.rect(screen, ACCENT_COLOUR if toggle_accent else CELL_COLOUR,
-                     (pos[0] * (cell_size + wall_size) + wall_size,
-                      pos[1] * (cell_size + wall_size) + wall_size,
-                      cell_size, cell_size))
+    shown_cells[pos[1] * n_shown + pos[0]] = 2 if toggle_accent else 1
+    if not is_visible(pos):
+        return
+    mark_dirty(pygame.draw.rect(screen, ACCENT_COLOUR if toggle_accent else CELL_COLOUR,
+                                ((pos[0] - view_origin[0]) * (cell_size + wall_size) + wall_size,
+                                 (pos[1] - view_origin[1]) * (cell_size + wall_size) + wall_size,
+                                 cell_size, cell_size)))
     if update_display:
-        pygame.display.update()
+        flush()
 
 
-def draw_path(pos1: tuple[int, int], pos2: tuple[int, int]) -> None:
+def draw_path(pos1: tuple[int, int], pos2: tuple[int, int], update_display: bool = True) -> None:
     """
     draws the path between pos1 and pos2, in table coordinates
-    Not implemented on text version of the UI because not feasible with this input data
-    and my limited terminal manipulation knowledge.
     :param pos1: position of the first Cell
     :param pos2: position of the second Cell
+    :param update_display: Determines if the display should be updated after drawing
     """
     h, w = cell_size, cell_size
     if pos2[0] + pos2[1] < pos1[0] + pos1[1]:
         pos1, pos2 = pos2, pos1
-    x = pos1[0] * (cell_size + wall_size) + wall_size
-    y = pos1[1] * (cell_size + wall_size) + wall_size
+    shown_links[pos1[1] * n_shown + pos1[0]] |= MASKS[DOWN] if pos1[0] == pos2[0] else MASKS[RIGHT]
+    if not is_visible(pos1) and not is_visible(pos2):
+        return
+    x = (pos1[0] - view_origin[0]) * (cell_size + wall_size) + wall_size
+    y = (pos1[1] - view_origin[1]) * (cell_size + wall_size) + wall_size
     if pos1[0] == pos2[0]:
         w += wall_size
     else:
         h += wall_size
-    pygame.draw.rect(screen, CELL_COLOUR, (x, y, h, w))
-    pygame.display.update()
+    rect = pygame.Rect(x, y, h, w)
+    if view_cells:
+        rect = rect.clip(view_rect())
+    mark_dirty(pygame.draw.rect(screen, CELL_COLOUR, rect))
+    if update_display:
+        flush()
+
+
+def view_rect() -> pygame.Rect:
+    """
+    :return: the area of the screen the labyrinth is drawn in
+    """
+    side = (view_cells or n_shown) * (cell_size + wall_size) + wall_size
+    return pygame.Rect(0, 0, side, side)
 
 
 def draw_table(table: list[list[Any]], accents: Optional[set[Any]] = None) -> None:
@@ -128,25 +282,224 @@ def draw_table(table: list[list[Any]], accents: Optional[set[Any]] = None) -> No
     """
     if not init_done:
         init(len(table))
+    draw_grid(table.grid, set() if accents is None else {cell.coordinates for cell in accents})
+
+
+def draw_grid(grid: MazeGrid, accent_positions: set[tuple[int, int]]) -> None:
+    """
+    draws a whole labyrinth from its cell masks
+    :param grid: the labyrinth
+    :param accent_positions: positions of the cells to draw accentuated
+    """
+    shown_cells[:] = bytes([1]) * len(shown_cells)
+    for x, y in accent_positions:
+        shown_cells[y * n_shown + x] = 2
+    shown_links[:] = grid.cells.translate(bytes(mask & (MASKS[RIGHT] | MASKS[DOWN]) for mask in range(256)))
+    if view_cells:
+        draw_view()
+        return
+    if raster is not None:
+        image = raster.rasterize(grid, cell_size, wall_size, accent_positions,
+                                 tuple(WALL_COLOUR)[:3], tuple(CELL_COLOUR)[:3], tuple(ACCENT_COLOUR)[:3])
+        screen.fill(BACKGROUND_COLOUR)
+        mark_dirty(screen.blit(pygame.surfarray.make_surface(image.transpose(1, 0, 2)), (0, 0)))
+        flush(True)
+        return
     draw_bg()
-    for x, line in enumerate(table):
-        for y, cell in enumerate(line):
-            if accents is None:
-                draw_cell((x, y), update_display=False)
-                draw_cell_links(cell)
-            else:
-                draw_cell((x, y), cell in accents, False)
-                draw_cell_links(cell)
-    pygame.display.update()
+    for index, mask in enumerate(grid.cells):
+        pos = grid.position(index)
+        draw_cell(pos, pos in accent_positions, False)
+        if mask & MASKS[RIGHT]:
+            draw_path(pos, (pos[0] + 1, pos[1]), False)
+        if mask & MASKS[DOWN]:
+            draw_path(pos, (pos[0], pos[1] + 1), False)
+    flush(True)
+
+
+def draw_region(table: list[list[Any]], region: tuple[int, int, int, int]) -> None:
+    """
+    draws again a rectangular region of the table, after it changed. Only that part of the screen is repainted and
+    sent to the display, and only the cells that were shown and the links between them are drawn, so that a hidden
+    labyrinth is not revealed, see backends.reveal_region.
+    :param table: The table to draw
+    :param region: tuple (x, y, width, height) of the region, in cells
+    """
+    x, y, width, height = region
+    reveal_region(table.grid, shown_links, region)
+    if view_cells:
+        if x < view_origin[0] + view_cells and view_origin[0] < x + width and \
+                y < view_origin[1] + view_cells and view_origin[1] < y + height:
+            draw_view()
+        return
+    step = cell_size + wall_size
+    mark_dirty(screen.fill(BACKGROUND_COLOUR,
+                           (x * step, y * step, width * step + wall_size, height * step + wall_size)))
+    for row in range(y, y + height):
+        for column in range(x, x + width):
+            pos = (column, row)
+            index = row * n_shown + column
+            if shown_cells[index]:
+                draw_cell(pos, shown_cells[index] == 2, False)
+            if shown_links[index] & MASKS[RIGHT]:
+                draw_path(pos, (column + 1, row), False)
+            if shown_links[index] & MASKS[DOWN]:
+                draw_path(pos, (column, row + 1), False)
+            if row == y and row and shown_links[index - n_shown] & MASKS[DOWN]:
+                draw_path(pos, (column, row - 1), False)
+            if column == x and column and shown_links[index - 1] & MASKS[RIGHT]:
+                draw_path(pos, (column - 1, row), False)
+    flush(True)
+
+
+def seek_generation(grid: MazeGrid, edges: array, shown: int) -> None:
+    """
+    draws a labyrinth as it was during its generation
+    :param grid: the generated labyrinth
+    :param edges: edge_id of the links made by the generation, in order
+    :param shown: number of links of edges made so far
+    """
+    cells = bytearray(grid.cells)
+    w = grid.width
+    for edge in edges[shown:]:
+        index1, index2 = edge_cells(edge, w)
+        code = DOWN if edge & 1 else RIGHT
+        cells[index1] &= ~MASKS[code]
+        cells[index2] &= ~MASKS[code ^ 2]
+    draw_grid(MazeGrid(w, grid.height, cells), set())
+
+
+def play_generation(table: list[list[Any]], edges: array, per_frame: int = 0) -> None:
+    """
+    animates the generation of a labyrinth from the order its links were made in, at max_fps frames per second,
+    and returns once every link is drawn. Keys: space pauses, left and right arrows seek one second back and forth,
+    home goes back to the start, end or escape skip to the end.
+    :param table: the generated table
+    :param edges: edge_id of the links made by the generation, in order, see main.create_ramifications
+    :param per_frame: links drawn per frame, edges_per_frame if 0
+    """
+    if not init_done:
+        init(len(table))
+    grid = table.grid
+    w = grid.width
+    fps = max_fps or 60
+    per_frame = per_frame or edges_per_frame or max(1, math.ceil(len(edges) / (playback_seconds * fps)))
+    clock = pygame.time.Clock()
+    shown = 0
+    paused = False
+    seek_generation(grid, edges, shown)
+    while shown < len(edges):
+        seek = None
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                exit(0)
+            if e.type == pygame.KEYDOWN:
+                if e.key in (pygame.K_END, pygame.K_ESCAPE):
+                    seek = len(edges)
+                elif e.key == pygame.K_HOME:
+                    seek = 0
+                elif e.key == pygame.K_LEFT:
+                    seek = max(0, shown - per_frame * fps)
+                elif e.key == pygame.K_RIGHT:
+                    seek = min(len(edges), shown + per_frame * fps)
+                elif e.key == pygame.K_SPACE:
+                    paused = not paused
+        if seek is not None:
+            shown = seek
+            seek_generation(grid, edges, shown)
+        elif not paused:
+            for edge in edges[shown:shown + per_frame]:
+                index1, index2 = edge_cells(edge, w)
+                draw_path(grid.position(index1), grid.position(index2), False)
+            shown = min(len(edges), shown + per_frame)
+        flush(True)
+        clock.tick(max_fps)
+
 
+def draw_view() -> None:
+    """
+    repaints the camera viewport from what has been drawn so far, and the minimap
+    """
+    ox, oy = view_origin
+    rows = [slice((oy + y) * n_shown + ox, (oy + y) * n_shown + ox + view_cells) for y in range(view_cells)]
+    links = b"".join(shown_links[row] for row in rows)
+    kinds = b"".join(shown_cells[row] for row in rows)
+    mark_dirty(screen.fill(BACKGROUND_COLOUR, view_rect()))
+    if raster is not None:
+        image = raster.rasterize(MazeGrid(view_cells, view_cells, bytearray(links)), cell_size, wall_size, None,
+                                 tuple(WALL_COLOUR)[:3], tuple(CELL_COLOUR)[:3], tuple(ACCENT_COLOUR)[:3],
+                                 raster.np.frombuffer(kinds, dtype=raster.np.uint8).reshape(view_cells, view_cells))
+        screen.blit(pygame.surfarray.make_surface(image.transpose(1, 0, 2)), (0, 0))
+    else:
+        for index in range(view_cells * view_cells):
+            y, x = divmod(index, view_cells)
+            pos = (ox + x, oy + y)
+            if kinds[index]:
+                draw_cell(pos, kinds[index] == 2, False)
+            if links[index] & MASKS[RIGHT]:
+                draw_path(pos, (pos[0] + 1, pos[1]), False)
+            if links[index] & MASKS[DOWN]:
+                draw_path(pos, (pos[0], pos[1] + 1), False)
+    draw_minimap()
+    flush(True)
 
-def draw_wrong() -> None:
+
+def draw_minimap(cursor: Optional[tuple[int, int]] = None) -> None:
+    """
+    draws a downsampled overview of the drawn cells, with the viewport outlined
+    :param cursor: position of the cell to mark on the minimap
+    """
+    if not minimap_size:
+        return
+    np = raster.np
+    step = -(-n_shown // minimap_size)
+    # a view of shown_cells, not a copy: only the sampled cells are read
+    kinds = np.frombuffer(shown_cells, dtype=np.uint8).reshape(n_shown, n_shown)[::step, ::step]
+    palette = np.array((tuple(WALL_COLOUR)[:3], tuple(CELL_COLOUR)[:3], tuple(ACCENT_COLOUR)[:3]), dtype=np.uint8)
+    surface = pygame.surfarray.make_surface(palette[kinds].transpose(1, 0, 2))
+    pygame.draw.rect(surface, ACCENT_COLOUR, (view_origin[0] // step, view_origin[1] // step,
+                                              max(1, view_cells // step), max(1, view_cells // step)), 1)
+    if cursor is not None:
+        surface.set_at((cursor[0] // step, cursor[1] // step), ACCENT_COLOUR)
+    left = view_rect().right
+    mark_dirty(screen.fill(BACKGROUND_COLOUR, (left, wrong_cue_size, minimap_size, minimap_size)))
+    mark_dirty(screen.blit(surface, (left, wrong_cue_size)))
+
+
+def follow(pos: tuple[int, int]) -> None:
+    """
+    scrolls the camera viewport so that pos stays away from its edges. Does nothing outside camera mode.
+    :param pos: tuple of table positions, (x, y) of the cursor
+    """
+    global view_origin
+    if not view_cells:
+        return
+    margin = view_cells // 4
+    limit = n_shown - view_cells
+    origin = list(view_origin)
+    for axis in (0, 1):
+        if not margin <= pos[axis] - origin[axis] < view_cells - margin:
+            origin[axis] = min(max(pos[axis] - view_cells // 2, 0), limit)
+    if tuple(origin) != view_origin:
+        view_origin = (origin[0], origin[1])
+        draw_view()
+    draw_minimap(pos)
+
+
+def draw_wrong(duration: float = 0.) -> None:
     """
     draws a "move wrong" cue
+    :param duration: if set, seconds after which the cue is removed by the render loop, without blocking. A new cue
+    drawn in the meantime restarts the delay.
     """
+    global wrong_cue_event
+    if wrong_cue_event is not None:
+        cancel(wrong_cue_event)
+        wrong_cue_event = None
+    if duration:
+        wrong_cue_event = schedule(duration, un_draw_wrong)
     pygame.draw.polygon(WRONG_CROSS_SURFACE, ACCENT_COLOUR, wrong_cross_points)
-    screen.blit(WRONG_CROSS_SURFACE, translate(screen.get_rect().topright, (-wrong_cue_size, 0)))
-    pygame.display.update()
+    mark_dirty(screen.blit(WRONG_CROSS_SURFACE, translate(screen.get_rect().topright, (-wrong_cue_size, 0))))
+    flush(True)
 
 
 def un_draw_wrong() -> None:
@@ -157,14 +510,15 @@ def un_draw_wrong() -> None:
     in the API constructor
     """
     WRONG_CROSS_SURFACE.fill(BACKGROUND_COLOUR)
-    screen.blit(WRONG_CROSS_SURFACE, translate(screen.get_rect().topright, (-wrong_cue_size, 0)))
-    pygame.display.update()
+    mark_dirty(screen.blit(WRONG_CROSS_SURFACE, translate(screen.get_rect().topright, (-wrong_cue_size, 0))))
+    flush(True)
 
 
 def display_victory() -> None:
     """
     displays a victory screen ayd exits the script.
     """
+    global display_updates
     draw_bg()
     font = pygame.font.SysFont('Castellar', 48)
     txt = font.render('You won!', True, CELL_COLOUR)
@@ -173,6 +527,7 @@ def display_victory() -> None:
     y = screen.get_rect().centery-txt_rect.centery
     screen.blit(txt, (x, y))
     pygame.display.flip()
+    display_updates += 1
 
     sleep(3)
     exit(0)
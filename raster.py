@@ -0,0 +1,111 @@
+"""
+Whole-labyrinth rasterization with NumPy: the pixels of every cell and link are computed in a few array operations
+from the MazeGrid masks, instead of one drawing call per cell. Works without pygame, so images can be exported
+headlessly.
+"""
+import struct
+import zlib
+from typing import Iterable, Optional
+import numpy as np
+from grid import MazeGrid
+
+WALL_COLOUR: tuple[int, int, int] = (4, 4, 4)
+CELL_COLOUR: tuple[int, int, int] = (4, 255, 4)
+ACCENT_COLOUR: tuple[int, int, int] = (255, 4, 4)
+
+
+def rasterize(grid: MazeGrid,
+              cell_size: int = 12,
+              wall_size: int = 3,
+              accents: Optional[Iterable[tuple[int, int]]] = None,
+              wall_colour: tuple[int, int, int] = WALL_COLOUR,
+              cell_colour: tuple[int, int, int] = CELL_COLOUR,
+              accent_colour: tuple[int, int, int] = ACCENT_COLOUR,
+              cell_kinds: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    builds the image of a labyrinth, with the same layout as pygame_graphics
+    :param grid: the labyrinth to draw
+    :param cell_size: side of a cell, in pixels
+    :param wall_size: thickness of a wall, in pixels
+    :param accents: positions of the cells to draw in accent colour
+    :param wall_colour: RGB colour of the walls and background
+    :param cell_colour: RGB colour of the cells and links
+    :param accent_colour: RGB colour of the accentuated cells
+    :param cell_kinds: array of shape (height, width) giving the colour of every cell: 0 wall, 1 cell, 2 accent.
+    Overrides accents.
+    :return: an array of shape (height, width, 3) of uint8 RGB pixels, rows first
+    """
+    pitch = cell_size + wall_size
+    masks = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height, grid.width)
+    # every cell owns a pitch x pitch tile: the cell itself, then the link to its right neighbour on the right,
+    # the link to its bottom neighbour below, and a wall in the bottom-right corner.
+    kinds = np.zeros((grid.height, pitch, grid.width, pitch), dtype=np.uint8)
+    if cell_kinds is None:
+        cell_kinds = np.ones((grid.height, grid.width), dtype=np.uint8)
+        if accents is not None:
+            for x, y in accents:
+                cell_kinds[y, x] = 2
+    kinds[:, :cell_size, :, :cell_size] = cell_kinds[:, None, :, None]
+    kinds[:, :cell_size, :, cell_size:] = ((masks & 8) != 0)[:, None, :, None]
+    kinds[:, cell_size:, :, :cell_size] = ((masks & 4) != 0)[:, None, :, None]
+
+    palette = np.array((wall_colour, cell_colour, accent_colour), dtype=np.uint8)
+    image = np.empty((grid.height * pitch + wall_size, grid.width * pitch + wall_size, 3), dtype=np.uint8)
+    image[:wall_size] = palette[0]
+    image[:, :wall_size] = palette[0]
+    image[wall_size:, wall_size:] = palette[kinds.reshape(grid.height * pitch, grid.width * pitch)]
+    return image
+
+
+def save_ppm(image: np.ndarray, path: str) -> None:
+    """
+    writes an image as a binary PPM file
+    :param image: array of shape (height, width, 3) of uint8 RGB pixels
+    :param path: the file to write
+    """
+    with open(path, "wb") as file:
+        file.write(b"P6\n%d %d\n255\n" % (image.shape[1], image.shape[0]))
+        file.write(np.ascontiguousarray(image).tobytes())
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def save_png(image: np.ndarray, path: str, compression: int = 6) -> None:
+    """
+    writes an image as a PNG file, using only zlib
+    :param image: array of shape (height, width, 3) of uint8 RGB pixels
+    :param path: the file to write
+    :param compression: zlib compression level, 0 to 9
+    """
+    height, width, _ = image.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # each row starts with filter type 0
+    rows[:, 1:] = image.reshape(height, width * 3)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(_png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)))
+        file.write(_png_chunk(b"IEND", b""))
+
+
+def export(grid: MazeGrid,
+           path: str,
+           cell_size: int = 12,
+           wall_size: int = 3,
+           accents: Optional[Iterable[tuple[int, int]]] = None) -> None:
+    """
+    rasterizes a labyrinth and writes it to a .png or .ppm file, depending on the extension
+    :param grid: the labyrinth to draw
+    :param path: the file to write
+    :param cell_size: side of a cell, in pixels
+    :param wall_size: thickness of a wall, in pixels
+    :param accents: positions of the cells to draw in accent colour
+    """
+    image = rasterize(grid, cell_size, wall_size, accents)
+    if path.lower().endswith(".ppm"):
+        save_ppm(image, path)
+    elif path.lower().endswith(".png"):
+        save_png(image, path)
+    else:
+        raise NameError("Invalid image format, use .png or .ppm")
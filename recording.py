@@ -0,0 +1,222 @@
+"""
+Recording and replay of solving runs.
+
+A MoveRecorder keeps every move attempt of a LabyrinthSolverAPI made with log=True as one byte of a growing
+bytearray: the direction code (grid.UP, ...) in bits 0 and 1, and bit 2 set if the move succeeded. Moves made with
+move_many are recorded in one go, with big integer arithmetic instead of a Python loop per move, so a recorded run
+of millions of moves costs a few milliseconds more.
+
+Log files hold a 48 bytes header followed by the moves, packed two per byte, the first one in the low nibble. A
+million moves take 500 KB. Header, little endian: magic b"LBRC", format version (1 byte), braid density in percent
+(1 byte), long_path (1 byte), 1 padding byte, width and height (unsigned 32 bits), seed (unsigned 64 bits), the
+generation algorithm name (16 bytes, NUL padded) and the number of moves (unsigned 64 bits).
+
+replay builds the same labyrinth again from the header and plays the moves on it, either headless at full speed or
+drawn at a chosen number of moves per second. Runs on labyrinths changed by regenerate_region can't be replayed.
+
+    python recording.py run.lbrc --fps 30
+"""
+import argparse
+import os
+import struct
+from time import perf_counter, sleep
+from typing import Any, Callable, Optional
+from grid import DIRECTIONS
+
+MAGIC: bytes = b"LBRC"
+VERSION: int = 1
+HEADER = struct.Struct("<4sBB?xIIQ16sQ")
+
+OK_BIT: int = 1 << 2
+_OK_BITS: bytes = bytes(OK_BIT if byte else 0 for byte in range(256))  # move_many results -> success bits
+_HIGH_NIBBLE: bytes = bytes((byte & 15) << 4 for byte in range(256))
+_LOW: bytes = bytes(byte & 15 for byte in range(256))
+_HIGH: bytes = bytes(byte >> 4 for byte in range(256))
+_CODES: bytes = bytes(byte & 3 for byte in range(256))
+_RESULTS: bytes = bytes(byte >> 2 & 1 for byte in range(256))
+
+
+def _or(first: bytes, second: bytes) -> bytes:
+    """
+    :param first: bytes
+    :param second: bytes, as long as first
+    :return: the bitwise or of first and second, byte by byte
+    """
+    size = len(first)
+    return (int.from_bytes(first, "little") | int.from_bytes(second, "little")).to_bytes(size, "little")
+
+
+class MoveRecorder:
+    """
+    MoveRecorder class: the moves of one run, and the labyrinth they were made in.
+    """
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 seed: int,
+                 algorithm: str,
+                 long_path: bool = False,
+                 braid: float = 0.,
+                 moves: Optional[bytearray] = None) -> None:
+        """
+        MoveRecorder class builder
+        :param width: number of cells of the labyrinth along x
+        :param height: number of cells of the labyrinth along y
+        :param seed: seed the labyrinth was generated with
+        :param algorithm: name of the algorithm it was generated with, at most 16 ASCII characters
+        :param long_path: whether it was grown around a long carved path
+        :param braid: share of its dead ends removed, 0 to 1
+        :param moves: moves already recorded, one byte each
+        """
+        self.width: int = width
+        self.height: int = height
+        self.seed: int = seed
+        self.algorithm: str = algorithm
+        self.long_path: bool = long_path
+        self.braid: float = braid
+        self.moves: bytearray = bytearray() if moves is None else moves
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def record(self, code: int, moved: bool) -> None:
+        """
+        records one move attempt
+        :param code: direction code of the move
+        :param moved: whether the move succeeded
+        :return: None
+        """
+        self.moves.append(code | OK_BIT if moved else code)
+
+    def record_many(self, codes: bytes, results: bytes) -> None:
+        """
+        records a sequence of move attempts, as made by run_moves
+        :param codes: direction codes, possibly more than the moves made if they stopped at the end
+        :param results: 1 for every successful move and 0 for every failed one
+        :return: None
+        """
+        self.moves += _or(codes[:len(results)], results.translate(_OK_BITS))
+
+    @property
+    def codes(self) -> bytes:
+        """
+        :return: the direction code of every move
+        """
+        return self.moves.translate(_CODES)
+
+    @property
+    def results(self) -> bytes:
+        """
+        :return: 1 for every successful move and 0 for every failed one
+        """
+        return self.moves.translate(_RESULTS)
+
+    def encode(self) -> bytes:
+        """
+        :return: the log file contents
+        """
+        moves = self.moves
+        low = moves[0::2]
+        high = moves[1::2].translate(_HIGH_NIBBLE).ljust(len(low), b"\x00")
+        return HEADER.pack(MAGIC, VERSION, round(self.braid * 100), self.long_path, self.width, self.height,
+                           self.seed, self.algorithm.encode("ascii"), len(moves)) + _or(low, high)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "MoveRecorder":
+        """
+        reads log file contents
+        :param data: the contents
+        :return: the recorder holding them
+        """
+        magic, version, braid, long_path, width, height, seed, algorithm, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a move log")
+        packed = data[HEADER.size:HEADER.size + (count + 1) // 2]
+        if len(packed) != (count + 1) // 2:
+            raise ValueError("truncated move log")
+        moves = bytearray(2 * len(packed))
+        moves[0::2] = packed.translate(_LOW)
+        moves[1::2] = packed.translate(_HIGH)
+        del moves[count:]
+        return cls(width, height, seed, algorithm.rstrip(b"\x00").decode("ascii"), long_path, braid / 100, moves)
+
+    def save(self, path: str) -> None:
+        """
+        writes the log to a file, through a temporary file so that a crash never leaves a partial log
+        :param path: path of the file
+        :return: None
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.encode())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MoveRecorder":
+        """
+        reads a log file
+        :param path: path of the file
+        :return: the recorder holding it
+        """
+        with open(path, "rb") as file:
+            return cls.decode(file.read())
+
+
+def replay(log: MoveRecorder,
+           backend: str = "null",
+           fps: float = 0.,
+           win_callback: Optional[Callable[[], Any]] = None) -> Any:
+    """
+    plays a recorded run again, on the same labyrinth, and checks that every move has the recorded outcome
+    :param log: the recorded run
+    :param backend: name of the rendering backend, "null" for a headless replay
+    :param fps: moves drawn per second. If 0, the moves are run at full speed with move_many and only the final
+    position is drawn.
+    :param win_callback: function called every time the cursor reaches the end, instead of the victory screen.
+    Nothing is done if None.
+    :return: the LabyrinthSolverAPI the run was replayed on
+    """
+    from main import LabyrinthSolverAPI  # main imports this module
+    if log.width != log.height:
+        raise ValueError("only square labyrinths can be replayed")
+    api = LabyrinthSolverAPI(log.width, drm=fps > 0, algorithm=log.algorithm, backend=backend, seed=log.seed,
+                             long_path=log.long_path, braid=log.braid)
+    # no victory screen: the backends' display_victory may exit, and the run may go on after the win
+    api.win = win_callback or (lambda: None)
+    codes = log.codes
+    expected = log.results
+    if not fps:
+        done = 0
+        while done < len(codes):
+            results, _ = api.move_many(codes[done:])
+            if results != expected[done:done + len(results)]:
+                raise ValueError("the log doesn't match the labyrinth")
+            done += len(results)
+        api.graphics.draw_cell(api.position, True)
+        api.graphics.flush(True)
+        return api
+    next_frame = perf_counter()
+    for n, code in enumerate(codes):
+        if api.move(DIRECTIONS[code]) != bool(expected[n]):
+            raise ValueError(f"the log doesn't match the labyrinth at move {n}")
+        api.graphics.flush(True)
+        next_frame += 1 / fps
+        delay = next_frame - perf_counter()
+        if delay > 0:
+            sleep(delay)
+    return api
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="replays a recorded solving run")
+    parser.add_argument("log", help="path of the log file")
+    parser.add_argument("--fps", type=float, default=0., help="moves per second, 0 to replay at full speed")
+    parser.add_argument("--backend", default="pygame")
+    arguments = parser.parse_args()
+    recorded = MoveRecorder.load(arguments.log)
+    start = perf_counter()
+    replayed = replay(recorded, arguments.backend, arguments.fps)
+    print(f"{len(recorded)} moves replayed in {perf_counter() - start:.3f}s, "
+          f"{replayed.moves_made} made, {replayed.wrong_moves} wrong")
+    if arguments.backend != "null":
+        replayed.graphics.loop()
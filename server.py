@@ -0,0 +1,238 @@
+"""
+Local labyrinth server: hosts labyrinths and cursor sessions behind a line protocol, on a TCP socket bound to
+localhost or on a Unix socket, so that solvers can be written in any language and run in other processes.
+
+Every request is one line, answered by one line, in order. Requests can be pipelined: a client may send many of
+them without waiting, the answers come back in the same order.
+
+    NEW <side> <seed> <algorithm>   opens a session on a labyrinth, generated once and shared by all its sessions
+                                    -> OK <session> <width> <height> <x> <y> <mask>
+    M <session> <moves>             moves are letters, u l d r, e.g. "M 3 rrdlu"
+                                    -> R <results> <x> <y> <mask>, results a 0 / 1 digit per move made
+    S <session>                     -> S <x> <y> <moves made> <wrong moves> <won>
+    Q <session>                     closes a session -> OK
+    anything wrong                  -> ERR <message>
+
+A request line longer than max_request is answered "ERR request too long" and its connection is closed.
+
+A move batch stops at the end cell, so results may be shorter than moves. mask is the open directions bitmask of
+the cursor's cell, bit 1 up, 2 left, 4 down, 8 right. Sessions are closed when their connection is.
+
+    python server.py serve --port 7777
+    python server.py bench --sessions 1000
+"""
+import argparse
+import asyncio
+import os
+from itertools import count
+from time import perf_counter
+from typing import Optional
+import batch
+from client import MazeClient
+from shared import Cursor, SharedMaze
+
+HOST: str = "127.0.0.1"
+max_side: int = 2000
+max_request: int = 1 << 20  # longest request line, i.e. about a million moves per batch
+_MOVE_CODES: bytes = bytes(b"uldr".index(c) if c in b"uldr" else 255 for c in range(256))
+_RESULT_DIGITS: bytes = b"01" + bytes(254)
+
+
+class MazeServer:
+    """
+    MazeServer class: the labyrinths, the sessions, and the connection handler.
+    """
+    def __init__(self) -> None:
+        """
+        MazeServer class builder
+        """
+        self.mazes: dict[tuple[int, int, str], SharedMaze] = {}
+        self.sessions: dict[int, Cursor] = {}
+        self.session_ids = count(1)
+        self._generating: dict[tuple[int, int, str], asyncio.Future] = {}
+
+    async def get_maze(self, side: int, seed: int, algorithm: str) -> SharedMaze:
+        """
+        gets a hosted labyrinth, generating it in a worker thread the first time it is asked for
+        :param side: side of the labyrinth
+        :param seed: seed of the generation
+        :param algorithm: name of the generation algorithm
+        :return: the labyrinth
+        """
+        key = (side, seed, algorithm)
+        if key in self.mazes:
+            return self.mazes[key]
+        if key not in self._generating:
+            loop = asyncio.get_running_loop()
+            self._generating[key] = loop.run_in_executor(None, batch.generate_maze, side, algorithm, seed)
+        try:
+            grid = await self._generating[key]
+        finally:
+            self._generating.pop(key, None)
+        if key not in self.mazes:
+            self.mazes[key] = SharedMaze.create(grid)
+        return self.mazes[key]
+
+    async def handle(self, line: bytes, owned: set[int]) -> bytes:
+        """
+        answers one request
+        :param line: the request, without its line ending
+        :param owned: ids of the sessions opened by this connection
+        :return: the answer, without its line ending
+        """
+        words = line.split()
+        if not words:
+            return b"ERR empty request"
+        command = words[0]
+        try:
+            if command == b"M" and len(words) in (2, 3):
+                cursor = self.sessions[int(words[1])]
+                codes = words[2].translate(_MOVE_CODES) if len(words) == 3 else b""
+                results, (x, y) = cursor.move_many(codes)
+                return b"R %s %d %d %d" % (results.translate(_RESULT_DIGITS), x, y, cursor.mask)
+            if command == b"NEW" and len(words) == 4:
+                side, seed, algorithm = int(words[1]), int(words[2]), words[3].decode("ascii")
+                if not 1 < side <= max_side:
+                    return b"ERR side out of range"
+                maze = await self.get_maze(side, seed, algorithm)
+                session = next(self.session_ids)
+                cursor = self.sessions[session] = maze.cursor()
+                owned.add(session)
+                x, y = cursor.position
+                return b"OK %d %d %d %d %d %d" % (session, maze.grid.width, maze.grid.height, x, y, cursor.mask)
+            if command == b"S" and len(words) == 2:
+                stats = self.sessions[int(words[1])].stats()
+                x, y = stats["position"]
+                return b"S %d %d %d %d %d" % (x, y, stats["moves_made"], stats["wrong_moves"], stats["won"])
+            if command == b"Q" and len(words) == 2:
+                session = int(words[1])
+                del self.sessions[session]
+                owned.discard(session)
+                return b"OK"
+        except KeyError:
+            return b"ERR unknown session"
+        except (ValueError, NameError) as error:
+            return b"ERR " + str(error).encode()
+        return b"ERR invalid request"
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        answers the requests of one connection until it is closed
+        :param reader: the connection's input
+        :param writer: the connection's output
+        """
+        owned: set[int] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than max_request, the rest of it can't be told from the next requests
+                    writer.write(b"ERR request too long\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                writer.write(await self.handle(line.rstrip(b"\r\n"), owned) + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session in owned:
+                self.sessions.pop(session, None)
+            writer.close()
+
+    async def start(self, port: int = 0, path: Optional[str] = None) -> asyncio.AbstractServer:
+        """
+        starts listening
+        :param port: TCP port on localhost, 0 for any free one
+        :param path: if set, listens on this Unix socket instead
+        :return: the asyncio server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.serve_connection, path, limit=max_request)
+        return await asyncio.start_server(self.serve_connection, HOST, port, limit=max_request)
+
+    def close(self) -> None:
+        """
+        frees the hosted labyrinths
+        :return: None
+        """
+        self.sessions.clear()
+        for maze in self.mazes.values():
+            maze.close(unlink=True)
+        self.mazes.clear()
+
+
+async def serve(port: int = 7777, path: Optional[str] = None) -> None:
+    """
+    runs a server until cancelled
+    :param port: TCP port on localhost
+    :param path: if set, listens on this Unix socket instead
+    """
+    maze_server = MazeServer()
+    server = await maze_server.start(port, path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        maze_server.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+async def benchmark(sessions: int = 1000,
+                    connections: int = 50,
+                    batches: int = 20,
+                    batch_size: int = 500,
+                    side: int = 100) -> dict[str, float]:
+    """
+    measures the move throughput of a local server, with many sessions pipelining random move batches
+    :param sessions: number of sessions, spread over the connections
+    :param connections: number of client connections
+    :param batches: move batches sent by every session
+    :param batch_size: moves per batch
+    :param side: side of the labyrinth all the sessions play on
+    :return: dict with the moves made, the seconds taken and the moves per second
+    """
+    maze_server = MazeServer()
+    server = await maze_server.start()
+    port = server.sockets[0].getsockname()[1]
+    clients = [await MazeClient.connect(HOST, port) for _ in range(connections)]
+    per_client = [[await clients[k % connections].new(side, 0) for k in range(n, sessions, connections)]
+                  for n in range(connections)]
+    moves = bytes(b"uldr"[b & 3] for b in os.urandom(batch_size)).decode()
+
+    async def play(client: MazeClient, own: list[int]) -> int:
+        made = 0
+        for results, _, _ in await client.pipeline([(session, moves) for session in own for _ in range(batches)]):
+            made += len(results)
+        return made
+
+    start = perf_counter()
+    made = sum(await asyncio.gather(*(play(client, own) for client, own in zip(clients, per_client))))
+    seconds = perf_counter() - start
+    for client in clients:
+        await client.close()
+    server.close()
+    await server.wait_closed()
+    maze_server.close()
+    return {"moves": made, "seconds": seconds, "moves_per_second": made / seconds}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="local labyrinth server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--port", type=int, default=7777)
+    serve_parser.add_argument("--unix", default=None, help="Unix socket path, instead of TCP")
+    bench_parser = commands.add_parser("bench")
+    bench_parser.add_argument("--sessions", type=int, default=1000)
+    bench_parser.add_argument("--connections", type=int, default=50)
+    bench_parser.add_argument("--batches", type=int, default=20)
+    bench_parser.add_argument("--batch-size", type=int, default=500)
+    arguments = parser.parse_args()
+    if arguments.command == "serve":
+        asyncio.run(serve(arguments.port, arguments.unix))
+    else:
+        print(asyncio.run(benchmark(arguments.sessions, arguments.connections, arguments.batches,
+                                    arguments.batch_size)))
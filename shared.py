@@ -0,0 +1,227 @@
+"""
+One labyrinth, many players.
+
+SharedMaze puts the cells of a generated labyrinth in a multiprocessing.shared_memory block, behind a read only view,
+so every process and thread works on the same single copy. Cursor is a player session on top of it: its own
+position, callbacks and stats, and a lock so that it can be moved from several threads. A cursor only holds a few
+integers, so N players cost one labyrinth plus N cursors.
+
+A SharedMaze can be sent to another process as is (pickled, it only carries the name of its block) and is
+re-attached there. The process that created it owns the block and frees it with close(unlink=True).
+"""
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Iterable, Optional, Union
+from grid import MazeGrid, DIRECTION_CODES, encode_directions, run_moves
+
+# width, height, start index and end index, then one byte per cell
+LAYOUT = struct.Struct("<IIII")
+
+
+def _attach(name: str, track: bool) -> shared_memory.SharedMemory:
+    """
+    attaches to a shared memory block
+    :param name: name of the block
+    :param track: whether this process is responsible for freeing the block. Before Python 3.13, every process
+    attaching to a block would otherwise free it on exit.
+    :return: the block
+    """
+    if track:
+        return shared_memory.SharedMemory(name)
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Python < 3.13
+        memory = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+class SharedMaze:
+    """
+    SharedMaze class: an immutable labyrinth in shared memory.
+    """
+    def __init__(self, name: str, owner: bool = False) -> None:
+        """
+        SharedMaze class builder: attaches to an existing block, see create to make one
+        :param name: name of the shared memory block
+        :param owner: whether this process created the block
+        """
+        self.memory: shared_memory.SharedMemory = _attach(name, track=owner)
+        self.owner: bool = owner
+        width, height, start, end = LAYOUT.unpack_from(self.memory.buf)
+        self.start: int = start
+        self.end: int = end
+        self.grid: MazeGrid = MazeGrid(width, height,
+                                       self.memory.buf[LAYOUT.size:LAYOUT.size + width * height].toreadonly())
+
+    @classmethod
+    def create(cls, grid: MazeGrid, start: int = 0, end: Optional[int] = None) -> "SharedMaze":
+        """
+        copies a labyrinth into a new shared memory block
+        :param grid: the labyrinth
+        :param start: flat index of the cell cursors start on
+        :param end: flat index of the cell cursors have to reach, the last cell if None
+        :return: the shared labyrinth, owning the block
+        """
+        if end is None:
+            end = len(grid) - 1
+        memory = shared_memory.SharedMemory(create=True, size=LAYOUT.size + len(grid))
+        LAYOUT.pack_into(memory.buf, 0, grid.width, grid.height, start, end)
+        memory.buf[LAYOUT.size:LAYOUT.size + len(grid)] = grid.cells
+        name = memory.name
+        memory.close()
+        return cls(name, owner=True)
+
+    @property
+    def name(self) -> str:
+        """
+        :return: the name of the shared memory block, to attach to it from another process
+        """
+        return self.memory.name
+
+    def __reduce__(self) -> tuple:
+        return SharedMaze, (self.name,)
+
+    def __enter__(self) -> "SharedMaze":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close(unlink=self.owner)
+
+    def cursor(self,
+               win_callback: Optional[Callable[["Cursor"], None]] = None,
+               wrong_callback: Optional[Callable[["Cursor"], None]] = None) -> "Cursor":
+        """
+        opens a player session on this labyrinth
+        :param win_callback: function called with the cursor when it reaches the end
+        :param wrong_callback: function called with the cursor on every move into a wall made with Cursor.move
+        :return: a new cursor, on the start cell
+        """
+        return Cursor(self, win_callback, wrong_callback)
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        detaches from the shared memory block. Cursors on this labyrinth must not be used anymore.
+        :param unlink: also frees the block, once every process has detached. Only the owner should do it.
+        :return: None
+        """
+        self.grid.cells.release()
+        self.memory.close()
+        if unlink:
+            # processes that attached before Python 3.13 took the block off the books of the shared resource tracker
+            resource_tracker.register(self.memory._name, "shared_memory")
+            self.memory.unlink()
+
+
+class Cursor:
+    """
+    Cursor class: a player session on a SharedMaze. All its methods can be called from several threads.
+    """
+    __slots__ = ("maze", "index", "lock", "win_callback", "wrong_callback", "moves_made", "wrong_moves", "won")
+
+    def __init__(self,
+                 maze: SharedMaze,
+                 win_callback: Optional[Callable[["Cursor"], None]] = None,
+                 wrong_callback: Optional[Callable[["Cursor"], None]] = None) -> None:
+        """
+        Cursor class builder
+        :param maze: the labyrinth to move in
+        :param win_callback: function called with the cursor when it reaches the end
+        :param wrong_callback: function called with the cursor on every move into a wall made with move
+        """
+        self.maze: SharedMaze = maze
+        self.index: int = maze.start
+        self.lock: threading.Lock = threading.Lock()
+        self.win_callback: Optional[Callable[["Cursor"], None]] = win_callback
+        self.wrong_callback: Optional[Callable[["Cursor"], None]] = wrong_callback
+        self.moves_made: int = 0
+        self.wrong_moves: int = 0
+        self.won: bool = False
+
+    @property
+    def position(self) -> tuple[int, int]:
+        """
+        :return: the tuple (x, y) of coordinates of the cursor
+        """
+        return self.maze.grid.position(self.index)
+
+    @property
+    def mask(self) -> int:
+        """
+        :return: the open directions bitmask of the cursor's cell
+        """
+        return self.maze.grid.cells[self.index]
+
+    @property
+    def near(self) -> dict[str, bool]:
+        """
+        :return: a dict, keys are "up", "left", "down", or "right", values are bools.
+        """
+        mask = self.mask
+        return {"up": bool(mask & 1), "left": bool(mask & 2), "down": bool(mask & 4), "right": bool(mask & 8)}
+
+    def move(self, direction: str) -> bool:
+        """
+        Moves the cursor in the specified direction
+        :param direction: The direction to move in. "up", "left", "down", or "right"
+        :return: True if movement was successful, else False.
+        """
+        code = DIRECTION_CODES.get(direction)
+        if code is None:
+            raise NameError("Invalid direction")
+        grid = self.maze.grid
+        with self.lock:
+            moved = bool(grid.cells[self.index] >> code & 1)
+            if moved:
+                self.index += (-grid.width, -1, grid.width, 1)[code]
+                self.moves_made += 1
+                won = self.index == self.maze.end and not self.won
+                self.won = self.won or won
+            else:
+                self.wrong_moves += 1
+        if not moved:
+            if self.wrong_callback is not None:
+                self.wrong_callback(self)
+        elif won and self.win_callback is not None:
+            self.win_callback(self)
+        return moved
+
+    def move_many(self, directions: Iterable[Union[str, int]]) -> tuple[bytearray, tuple[int, int]]:
+        """
+        Moves the cursor along a whole sequence of directions, stopping early if the end is reached. wrong_callback
+        is not called.
+        :param directions: iterable of directions, names ("up", "left", "down", "right") or codes (grid.UP, ...)
+        :return: a bytearray holding 1 for every successful move and 0 for every failed one, and the final position
+        """
+        codes = encode_directions(directions)
+        with self.lock:
+            results, self.index = run_moves(self.maze.grid, self.index, codes, self.maze.end)
+            successes = results.count(1)
+            self.moves_made += successes
+            self.wrong_moves += len(results) - successes
+            won = self.index == self.maze.end and successes > 0 and not self.won
+            self.won = self.won or won
+            position = self.position
+        if won and self.win_callback is not None:
+            self.win_callback(self)
+        return results, position
+
+    def reset(self) -> None:
+        """
+        puts the cursor back on the start cell and clears its stats
+        :return: None
+        """
+        with self.lock:
+            self.index = self.maze.start
+            self.moves_made = 0
+            self.wrong_moves = 0
+            self.won = False
+
+    def stats(self) -> dict[str, Union[int, bool, tuple[int, int]]]:
+        """
+        :return: the position, moves made, wrong moves and win state of the cursor
+        """
+        with self.lock:
+            return {"position": self.position, "moves_made": self.moves_made, "wrong_moves": self.wrong_moves,
+                    "won": self.won}
@@ -0,0 +1,260 @@
+"""
+Labyrinth solving algorithms.
+
+Every solver takes a MazeGrid and the flat indexes of the start and end cells, follows the open walls of the grid
+and returns the flat indexes of the cells of a shortest start -> end path, both ends included, or an empty list if
+the end can't be reached. ChallengeLabyrinth.solve wraps them and returns coordinates.
+
+Solving time in seconds, CPython 3.11, "grow" labyrinths from (0, 0) to the opposite corner, `python solvers.py`:
+
+    side    bfs      astar    bidirectional  dead_end_filling
+    100     0.01     0.01     0.00           0.01
+    500     0.17     0.23     0.05           0.28
+    1000    0.49     0.75     0.10           0.98
+    2000    3.50     2.43     0.25           2.99
+"""
+import heapq
+import random
+from array import array
+from time import perf_counter
+from typing import Callable, Optional
+from grid import MazeGrid, LINK_COUNT
+import generators
+
+SolverFunction = Callable[[MazeGrid, int, int], list[int]]
+
+SOLVERS: dict[str, SolverFunction] = {}
+
+
+def register_solver(name: str) -> Callable[[SolverFunction], SolverFunction]:
+    """
+    decorator registering a solving algorithm under a name, so it can be picked by ChallengeLabyrinth.solve
+    :param name: the name of the algorithm
+    :return: the decorator
+    """
+    def decorator(function: SolverFunction) -> SolverFunction:
+        SOLVERS[name] = function
+        return function
+    return decorator
+
+
+def solve(grid: MazeGrid, start: int, end: int, method: str = "bfs") -> list[int]:
+    """
+    finds a shortest path through a labyrinth
+    :param grid: the labyrinth
+    :param start: flat index of the start cell
+    :param end: flat index of the end cell
+    :param method: name of the algorithm, one of SOLVERS
+    :return: the flat indexes of the path cells, start and end included, empty if end can't be reached
+    """
+    if method not in SOLVERS:
+        raise NameError(f"Invalid solver: {method}")
+    return SOLVERS[method](grid, start, end)
+
+
+def _trace_back(came_from: bytearray, steps: tuple[int, int, int, int], start: int, end: int) -> list[int]:
+    """
+    rebuilds a path from the direction each cell was entered from
+    :param came_from: for every reached cell, 1 + the direction code it was entered in
+    :param steps: flat index offset of each direction
+    :param start: flat index of the start cell
+    :param end: flat index of the end cell
+    :return: the path from start to end
+    """
+    path = [end]
+    i = end
+    while i != start:
+        i -= steps[came_from[i] - 1]
+        path.append(i)
+    path.reverse()
+    return path
+
+
+@register_solver("bfs")
+def breadth_first(grid: MazeGrid, start: int, end: int) -> list[int]:
+    """
+    breadth first search from start, stopping when end is reached.
+    """
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    came_from = bytearray(len(cells))
+    came_from[start] = 5  # marks start as reached
+    queue = [start]
+    for i in queue:
+        if i == end:
+            return _trace_back(came_from, steps, start, end)
+        mask = cells[i]
+        for code in (0, 1, 2, 3):
+            if mask >> code & 1:
+                j = i + steps[code]
+                if not came_from[j]:
+                    came_from[j] = code + 1
+                    queue.append(j)
+    return []
+
+
+@register_solver("astar")
+def a_star(grid: MazeGrid, start: int, end: int) -> list[int]:
+    """
+    A* search, using the Manhattan distance to end as heuristic.
+    """
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    end_y, end_x = divmod(end, w)
+    came_from = bytearray(len(cells))
+    came_from[start] = 5
+    cost = array("l", bytes(8 * len(cells)))
+    start_y, start_x = divmod(start, w)
+    heap = [(abs(end_x - start_x) + abs(end_y - start_y), start)]
+    done = bytearray(len(cells))
+    while heap:
+        _, i = heapq.heappop(heap)
+        if i == end:
+            return _trace_back(came_from, steps, start, end)
+        if done[i]:
+            continue
+        done[i] = 1
+        mask = cells[i]
+        g = cost[i] + 1
+        for code in (0, 1, 2, 3):
+            if mask >> code & 1:
+                j = i + steps[code]
+                if not came_from[j] or (not done[j] and g < cost[j]):
+                    came_from[j] = code + 1
+                    cost[j] = g
+                    y, x = divmod(j, w)
+                    heapq.heappush(heap, (g + abs(end_x - x) + abs(end_y - y), j))
+    return []
+
+
+@register_solver("bidirectional")
+def bidirectional(grid: MazeGrid, start: int, end: int) -> list[int]:
+    """
+    breadth first searches from both start and end, one level at a time on the smaller frontier, until they meet.
+    """
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    if start == end:
+        return [start]
+    came_from = (bytearray(len(cells)), bytearray(len(cells)))
+    came_from[0][start] = 5
+    came_from[1][end] = 5
+    frontiers = ([start], [end])
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        mine, other = came_from[side], came_from[1 - side]
+        next_frontier = []
+        for i in frontiers[side]:
+            mask = cells[i]
+            for code in (0, 1, 2, 3):
+                if mask >> code & 1:
+                    j = i + steps[code]
+                    if mine[j]:
+                        continue
+                    mine[j] = code + 1
+                    if other[j]:
+                        to_start = _trace_back(came_from[0], steps, start, j)
+                        to_end = _trace_back(came_from[1], steps, end, j)
+                        to_end.reverse()
+                        return to_start + to_end[1:]
+                    next_frontier.append(j)
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+    return []
+
+
+@register_solver("dead_end_filling")
+def dead_end_filling(grid: MazeGrid, start: int, end: int) -> list[int]:
+    """
+    fills every dead end back to the nearest junction, then searches the cells left. In a perfect labyrinth only
+    the solution is left.
+    """
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    degree = cells.translate(LINK_COUNT)
+    filled = bytearray(len(cells))
+    dead_ends = [i for i in range(len(cells)) if degree[i] <= 1 and i != start and i != end]
+    for i in dead_ends:
+        filled[i] = 1
+        mask = cells[i]
+        for code in (0, 1, 2, 3):
+            if mask >> code & 1:
+                j = i + steps[code]
+                if not filled[j]:
+                    degree[j] -= 1
+                    if degree[j] == 1 and j != start and j != end:
+                        dead_ends.append(j)
+    if filled[end]:
+        return []
+    came_from = bytearray(len(cells))
+    came_from[start] = 5
+    queue = [start]
+    for i in queue:
+        if i == end:
+            return _trace_back(came_from, steps, start, end)
+        mask = cells[i]
+        for code in (0, 1, 2, 3):
+            if mask >> code & 1:
+                j = i + steps[code]
+                if not came_from[j] and not filled[j]:
+                    came_from[j] = code + 1
+                    queue.append(j)
+    return []
+
+
+def distance_field(grid: MazeGrid, source: int) -> array:
+    """
+    computes the shortest path distance from a cell to every other one, with a single breadth first search
+    :param grid: the labyrinth
+    :param source: flat index of the cell to measure distances from
+    :return: array of 32 bits ints indexed like grid.cells, -1 for unreachable cells
+    """
+    cells = grid.cells
+    w = grid.width
+    steps = (-w, -1, w, 1)
+    distances = array("i", [-1]) * len(cells)
+    distances[source] = 0
+    queue = [source]
+    for i in queue:
+        d = distances[i] + 1
+        mask = cells[i]
+        for code in (0, 1, 2, 3):
+            if mask >> code & 1:
+                j = i + steps[code]
+                if distances[j] < 0:
+                    distances[j] = d
+                    queue.append(j)
+    return distances
+
+
+def benchmark(sides: tuple[int, ...] = (100, 500, 1000, 2000),
+              methods: Optional[tuple[str, ...]] = None,
+              algorithm: str = "grow") -> dict[str, dict[int, float]]:
+    """
+    times every solver over several labyrinth sizes, from the top left corner to the bottom right one
+    :param sides: labyrinth sides to time
+    :param methods: solver names, all of SOLVERS if None
+    :param algorithm: generation algorithm of the labyrinths
+    :return: dict of solver name -> {side: seconds}
+    """
+    if methods is None:
+        methods = tuple(SOLVERS)
+    results: dict[str, dict[int, float]] = {method: {} for method in methods}
+    for side in sides:
+        grid = MazeGrid(side)
+        generators.generate(grid, algorithm, random.Random(side))
+        for method in methods:
+            start = perf_counter()
+            solve(grid, 0, len(grid) - 1, method)
+            results[method][side] = perf_counter() - start
+    return results
+
+
+if __name__ == '__main__':
+    timings = benchmark()
+    print("side".ljust(8) + "".join(name.ljust(15) for name in timings))
+    for s in (100, 500, 1000, 2000):
+        print(str(s).ljust(8) + "".join(f"{timings[name][s]:.2f}".ljust(15) for name in timings))
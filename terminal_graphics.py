@@ -1,12 +1,75 @@
-from typing import Optional, Any
+import sys
+from time import perf_counter, sleep
+from typing import Optional, Any, Iterable
+from backends import reveal_region
+from grid import MASKS, DOWN, RIGHT
 
 CHAR_CELL = "\u25A1"
 CHAR_ACCENT_CELL = "\u2716"
 CHAR_HORIZONTAL_PATH = "\u2550"
 CHAR_VERTICAL_PATH = "\u2016"
 
+# the cell (x, y) is drawn on terminal line 2y + 1, column 2x + 1, its links right after and right below it.
+# Drawings are queued as ANSI escape sequences and written in one go by flush(). What has been drawn is remembered
+# cell by cell (0 not drawn, 1 drawn, 2 accent; right and down link bits), so draw_region can't reveal more.
+side_shown: int = 0
+shown_cells: bytearray = bytearray()
+shown_links: bytearray = bytearray()
+pending: list[str] = []
+display_updates: int = 0  # number of writes to the terminal, read by metrics
+wrong_cue_until: float = 0.  # time at which the next flush removes the "move wrong" cue, 0 if not timed
 
-def init(side: int):
+
+def init(side: int, view: int = 0, minimap: int = 0):
+    global side_shown, shown_cells, shown_links
+    side_shown = side
+    shown_cells = bytearray(side * side)
+    shown_links = bytearray(side * side)
+    pending.clear()
+
+
+def loop():
+    """
+    nothing to keep running in a terminal, but a timed "move wrong" cue still showing is waited for and removed,
+    as no flush may come after it
+    """
+    if wrong_cue_until:
+        sleep(max(0., wrong_cue_until - perf_counter()))
+        flush()
+
+
+def move_to(line: int, column: int) -> str:
+    """
+    :param line: terminal line, starting at 1
+    :param column: terminal column, starting at 1
+    :return: the ANSI sequence moving the terminal cursor there
+    """
+    return f"\x1b[{line};{column}H"
+
+
+def flush(force: bool = False) -> None:
+    """
+    writes the queued drawings to the terminal in a single write, and parks the cursor under the labyrinth
+    :param force: unused, the terminal is always updated
+    """
+    global wrong_cue_until, display_updates
+    if wrong_cue_until and perf_counter() >= wrong_cue_until:
+        wrong_cue_until = 0.
+        pending.append(move_to(2 * side_shown + 1, 1) + "\x1b[K")
+    if not pending:
+        return
+    pending.append(move_to(2 * side_shown + 1, 1))
+    sys.stdout.write("".join(pending))
+    sys.stdout.flush()
+    display_updates += 1
+    pending.clear()
+
+
+def follow(pos: tuple[int, int]) -> None:
+    """
+    scrolls the camera viewport to follow the cursor
+    :param pos: tuple of table positions, (x, y) of the cursor
+    """
     pass
 
 
@@ -14,30 +77,42 @@ def draw_bg() -> None:
     """
     draws the background on top of the image
     """
-    pass
+    shown_cells[:] = bytes(len(shown_cells))
+    shown_links[:] = bytes(len(shown_links))
+    pending.append("\x1b[H\x1b[2J")
+    flush()
 
 
-def draw_cell(pos: tuple[int, int], toggle_accent: bool = False) -> None:
+def draw_cell(pos: tuple[int, int], toggle_accent: bool = False, update_display: bool = True) -> None:
     """
     draws the cell at position pos, in accent color if toggle accent else in normal colour
     pos is the tuple of table coordinates
-    Not implemented on text version of the UI because not feasible with this input data
-    and my limited terminal manipulation knowledge.
     :param pos: tuple of table positions, (x, y)
     :param toggle_accent: if True, uses accent color
+    :param update_display: Determines if the display should be updated after drawing
     """
-    pass
+    shown_cells[pos[1] * side_shown + pos[0]] = 2 if toggle_accent else 1
+    pending.append(move_to(2 * pos[1] + 1, 2 * pos[0] + 1) + (CHAR_ACCENT_CELL if toggle_accent else CHAR_CELL))
+    if update_display:
+        flush()
 
 
-def draw_path(pos1: tuple[int, int], pos2: tuple[int, int]) -> None:
+def draw_path(pos1: tuple[int, int], pos2: tuple[int, int], update_display: bool = True) -> None:
     """
     draws the path between pos1 and pos2, in table coordinates
-    Not implemented on text version of the UI because not feasible with this input data
-    and my limited terminal manipulation knowledge.
     :param pos1: position of the first Cell
     :param pos2: position of the second Cell
+    :param update_display: Determines if the display should be updated after drawing
     """
-    pass
+    if pos2[0] + pos2[1] < pos1[0] + pos1[1]:
+        pos1, pos2 = pos2, pos1
+    shown_links[pos1[1] * side_shown + pos1[0]] |= MASKS[DOWN] if pos1[0] == pos2[0] else MASKS[RIGHT]
+    if pos1[0] == pos2[0]:
+        pending.append(move_to(2 * pos1[1] + 2, 2 * pos1[0] + 1) + CHAR_VERTICAL_PATH)
+    else:
+        pending.append(move_to(2 * pos1[1] + 1, 2 * pos1[0] + 2) + CHAR_HORIZONTAL_PATH)
+    if update_display:
+        flush()
 
 
 def transpose(table: list[list[Any]]) -> list[list[Any]]:
@@ -55,42 +130,94 @@ def transpose(table: list[list[Any]]) -> list[list[Any]]:
     return new
 
 
+def render_rows(rows: Iterable[bytes], accents: Optional[set[tuple[int, int]]] = None, first_row: int = 0) -> str:
+    """
+    renders rows of cell masks as text
+    :param rows: iterable of rows of cell masks
+    :param accents: positions of the cells to draw accentuated
+    :param first_row: y coordinate of the first row, to match accents
+    :return: two lines of text per row, the cells and their right links then their down links
+    """
+    lines = []
+    for y, row in enumerate(rows, first_row):
+        lines.append("".join((CHAR_ACCENT_CELL if accents and (x, y) in accents else CHAR_CELL)
+                             + (CHAR_HORIZONTAL_PATH if mask & MASKS[RIGHT] else " ")
+                             for x, mask in enumerate(row)))
+        lines.append("".join((CHAR_VERTICAL_PATH if mask & MASKS[DOWN] else " ") + " " for mask in row))
+    return "\n".join(lines) + "\n"
+
+
 def draw_table(table: list[list[Any]], accents: Optional[set[Any]] = None) -> None:
     """
-    draws the whole table from the list of cells
+    draws the whole table from the list of cells, as a single write
     :param table: The table to draw
     :param accents: set of cells to draw accentuated
     """
-    table = transpose(table)
-    if accents is None:
-        accents = set()
-    for i, line in enumerate(table):
-        for j, cell in enumerate(line):
-            if cell in accents:
-                print(CHAR_ACCENT_CELL, end="")
-            else:
-                print(CHAR_CELL, end="")
-            if j != len(line) - 1 and line[1+j] in cell.links:
-                print(CHAR_HORIZONTAL_PATH, end="")
-            else:
-                print(" ", end="")
-        print()
-
-        if line != table[-1]:
-            for j, cell in enumerate(line):
-                if table[i+1][j] in cell.links:
-                    print(CHAR_VERTICAL_PATH, end="")
-                else:
-                    print(" ", end="")
-                print(" ", end="")
-        print()
-
-
-def draw_wrong() -> None:
+    global side_shown, shown_cells, shown_links
+    grid = table.grid
+    side_shown = grid.height
+    accent_positions = set() if accents is None else {cell.coordinates for cell in accents}
+    shown_cells = bytearray([1]) * len(grid.cells)
+    for x, y in accent_positions:
+        shown_cells[y * grid.width + x] = 2
+    shown_links = grid.cells.translate(bytes(mask & (MASKS[RIGHT] | MASKS[DOWN]) for mask in range(256)))
+    rows = (grid.cells[y * grid.width:(y + 1) * grid.width] for y in range(grid.height))
+    pending.append("\x1b[H\x1b[2J" + render_rows(rows, accent_positions))
+    flush()
+
+
+def play_generation(table: list[list[Any]], edges: Any, per_frame: int = 0) -> None:
+    """
+    shows a generated labyrinth. The terminal doesn't animate the generation, only its result is drawn.
+    :param table: the generated table
+    :param edges: edge_id of the links made by the generation, in order
+    :param per_frame: unused
+    """
+    draw_table(table)
+
+
+def draw_region(table: list[list[Any]], region: tuple[int, int, int, int]) -> None:
+    """
+    draws again a rectangular region of the table, after it changed. Only the characters of its cells and of their
+    right and down links are written, and only the cells that were shown and the links between them, so that a
+    hidden labyrinth is not revealed, see backends.reveal_region.
+    :param table: The table to draw
+    :param region: tuple (x, y, width, height) of the region, in cells
+    """
+    x, y, width, height = region
+    reveal_region(table.grid, shown_links, region)
+    chars = " " + CHAR_CELL + CHAR_ACCENT_CELL
+    for row in range(y, y + height):
+        start = row * side_shown + x
+        kinds = shown_cells[start:start + width]
+        links = shown_links[start:start + width]
+        pending.append(move_to(2 * row + 1, 2 * x + 1)
+                       + "".join(chars[kind] + (CHAR_HORIZONTAL_PATH if mask & MASKS[RIGHT] else " ")
+                                 for kind, mask in zip(kinds, links)))
+        pending.append(move_to(2 * row + 2, 2 * x + 1)
+                       + "".join((CHAR_VERTICAL_PATH if mask & MASKS[DOWN] else " ") + " " for mask in links))
+    flush()
+
+
+def draw_rows(rows: Iterable[bytes]) -> None:
+    """
+    draws a labyrinth streamed row by row, such as generators.eller_rows, printing each row as soon as it comes.
+    Only the current row is held in memory.
+    :param rows: iterable of rows of cell masks
+    """
+    for row in rows:
+        sys.stdout.write(render_rows((row,)))
+
+
+def draw_wrong(duration: float = 0.) -> None:
     """
     draws a "move wrong" cue
+    :param duration: if set, seconds after which the cue is removed, by the first flush or loop past that time
     """
-    print("Move wrong!")
+    global wrong_cue_until
+    wrong_cue_until = perf_counter() + duration if duration else 0.
+    pending.append(move_to(2 * side_shown + 1, 1) + "Move wrong!\x1b[K")
+    flush()
 
 
 def un_draw_wrong() -> None:
@@ -100,14 +227,19 @@ def un_draw_wrong() -> None:
     you can disable the "move wrong" cue by specifying a "wrong callback function"
     in the API constructor
     """
-    print("\n")
+    global wrong_cue_until
+    wrong_cue_until = 0.
+    pending.append(move_to(2 * side_shown + 1, 1) + "\x1b[K")
+    flush()
 
 
 def display_victory() -> None:
     """
     displays a victory screen ayd exits the script.
     """
-    print("you won!")
+    flush()
+    sys.stdout.write("you won!\x1b[K\n")
+    sys.stdout.flush()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,47 @@
+"""
+Regression checks of the move paths: python -m pytest test_moves.py
+"""
+from grid import DIRECTIONS, OFFSETS, run_moves
+from main import LabyrinthSolverAPI
+from shared import SharedMaze
+
+
+def _solution_codes(api: LabyrinthSolverAPI) -> bytes:
+    """
+    :param api: a labyrinth
+    :return: the direction codes of a shortest path from start to end
+    """
+    path = api.solve()
+    return bytes(OFFSETS.index((x2 - x1, y2 - y1)) for (x1, y1), (x2, y2) in zip(path, path[1:]))
+
+
+def test_run_moves_starting_on_stop():
+    api = LabyrinthSolverAPI(5, backend="null", seed=1, win_callback=lambda: None)
+    codes = _solution_codes(api)
+    end = api.grid.index(api.end.coordinates)
+    results, index = run_moves(api.grid, end, bytes([codes[-1] ^ 2]), end)
+    assert results == bytearray([1]) and index != end
+    results, index = run_moves(api.grid, end, bytes([codes[-1] ^ 2, codes[-1], codes[-1]]), end)
+    assert len(results) == 2 and index == end
+
+
+def test_move_many_after_winning():
+    wins = []
+    api = LabyrinthSolverAPI(5, backend="null", seed=1, win_callback=lambda: wins.append(1))
+    codes = _solution_codes(api)
+    api.move_many(codes)
+    assert wins == [1]
+    results, position = api.move_many([DIRECTIONS[codes[-1] ^ 2]])
+    assert results == bytearray([1]) and position != api.end.coordinates
+    assert api.move(DIRECTIONS[codes[-1]]) and wins == [1, 1]
+
+
+def test_cursor_move_many_after_winning():
+    api = LabyrinthSolverAPI(5, backend="null", seed=1, win_callback=lambda: None)
+    codes = _solution_codes(api)
+    with api.share() as maze:
+        cursor = maze.cursor()
+        cursor.move_many(codes)
+        assert cursor.won
+        results, _ = cursor.move_many(bytes([codes[-1] ^ 2]))
+        assert results == bytearray([1])
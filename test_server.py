@@ -0,0 +1,34 @@
+"""
+Regression checks of the labyrinth server: python -m pytest test_server.py
+"""
+import asyncio
+import server
+
+
+def test_request_too_long():
+    async def run() -> tuple[bytes, bytes, bytes]:
+        maze_server = server.MazeServer()
+        listening = await maze_server.start()
+        port = listening.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection(server.HOST, port, limit=server.max_request)
+            writer.write(b"M 1 " + b"r" * server.max_request + b"\n")
+            await writer.drain()
+            answer = await reader.readline()
+            closed = await reader.read()
+            writer.close()
+            reader, writer = await asyncio.open_connection(server.HOST, port)
+            writer.write(b"S 1\n")
+            await writer.drain()
+            other = await reader.readline()
+            writer.close()
+            return answer, closed, other
+        finally:
+            listening.close()
+            await listening.wait_closed()
+            maze_server.close()
+
+    answer, closed, other = asyncio.run(run())
+    assert answer == b"ERR request too long\n"
+    assert closed == b""
+    assert other == b"ERR unknown session\n"
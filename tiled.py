@@ -0,0 +1,135 @@
+"""
+Tiled generation of huge labyrinths over several processes.
+
+The grid is cut into tiles of tile_size x tile_size cells. Every tile is generated as a perfect labyrinth of its own
+by a worker of a ProcessPoolExecutor, then copied into the grid. The tiles are then stitched together along a random
+spanning tree of the tiles: for every edge of that tree, one random wall of the border between both tiles is opened.
+A spanning tree of spanning trees is a spanning tree, so the result is still a perfect labyrinth, and every cell,
+start and end included, is connected to every other one.
+
+Pre-linked cells are kept, but their links must not cross tile borders.
+Used by the "tiled" generation algorithm of generators, which imports this module on first use, configured by the
+module globals below.
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Optional
+from grid import MazeGrid, MASKS, UP, LEFT, DOWN, RIGHT
+import generators
+
+tile_size: int = 500  # side of a tile, in cells
+tile_algorithm: str = "eller"  # algorithm every tile is generated with
+max_workers: Optional[int] = None  # worker processes, one per core if None, 1 generates in this process
+
+
+def _generate_tile(task: tuple[int, int, Optional[bytes], str, int]) -> bytes:
+    """
+    generates one tile, runs in a worker process
+    :param task: tuple (width, height, pre-linked cell masks or None, algorithm, seed)
+    :return: the cell masks of the tile
+    """
+    width, height, cells, algorithm, seed = task
+    tile = MazeGrid(width, height, None if cells is None else bytearray(cells))
+    generators.generate(tile, algorithm, random.Random(seed))
+    return bytes(tile.cells)
+
+
+def _tile_tree(columns: int, rows: int, rng: random.Random) -> list[tuple[int, int]]:
+    """
+    draws a random spanning tree of the tiles, with Kruskal's algorithm
+    :param columns: number of tiles along x
+    :param rows: number of tiles along y
+    :param rng: random number generator
+    :return: the edges of the tree, as pairs of tile numbers, the second one right of or below the first one
+    """
+    edges = [(t, t + 1) for t in range(columns * rows) if t % columns != columns - 1]
+    edges += [(t, t + columns) for t in range(columns * (rows - 1))]
+    rng.shuffle(edges)
+    parent = list(range(columns * rows))
+    tree = []
+    for a, b in edges:
+        root_a, root_b = a, b
+        while parent[root_a] != root_a:
+            parent[root_a] = root_a = parent[parent[root_a]]
+        while parent[root_b] != root_b:
+            parent[root_b] = root_b = parent[parent[root_b]]
+        if root_a != root_b:
+            parent[root_b] = root_a
+            tree.append((a, b))
+    return tree
+
+
+def generate_tiled(grid: MazeGrid,
+                   rng: random.Random,
+                   on_link: Optional[Callable[[int, int], None]] = None,
+                   tile: Optional[int] = None,
+                   algorithm: Optional[str] = None,
+                   workers: Optional[int] = None) -> None:
+    """
+    generates a labyrinth tile by tile in worker processes, then stitches the tiles together
+    :param grid: the grid to link, possibly with pre-linked cells not linked across tile borders
+    :param rng: random number generator, the tile seeds and the stitching are drawn from it
+    :param on_link: function called with the indexes of both cells of every new link, once the tiles are generated
+    :param tile: side of a tile in cells, tile_size if None
+    :param algorithm: algorithm every tile is generated with, tile_algorithm if None
+    :param workers: number of worker processes, max_workers if None
+    :return: None.
+    """
+    tile = tile or tile_size
+    algorithm = algorithm or tile_algorithm
+    workers = workers or max_workers
+    w, h = grid.width, grid.height
+    cells = grid.cells
+    columns, rows = -(-w // tile), -(-h // tile)
+    before = bytes(cells) if on_link is not None else None
+
+    tasks = []
+    for t in range(columns * rows):
+        x0, y0 = t % columns * tile, t // columns * tile
+        tw, th = min(tile, w - x0), min(tile, h - y0)
+        part = b"".join(cells[(y0 + y) * w + x0:(y0 + y) * w + x0 + tw] for y in range(th))
+        if any(part):
+            border = [part[y * tw] & MASKS[LEFT] | part[y * tw + tw - 1] & MASKS[RIGHT] for y in range(th)]
+            border += [part[x] & MASKS[UP] | part[(th - 1) * tw + x] & MASKS[DOWN] for x in range(tw)]
+            if any(border):
+                raise ValueError("pre-linked cells are linked across tile borders")
+        tasks.append((tw, th, part if any(part) else None, algorithm, rng.getrandbits(64)))
+
+    if columns * rows == 1 or workers == 1:
+        _copy_tiles(grid, tile, columns, map(_generate_tile, tasks))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            _copy_tiles(grid, tile, columns, executor.map(_generate_tile, tasks))
+
+    for a, b in _tile_tree(columns, rows, rng):
+        x0, y0 = a % columns * tile, a // columns * tile
+        if b == a + columns:  # b is below a: open a wall of a's last row
+            length = min(tile, w - x0)
+            grid.open((y0 + tile - 1) * w + x0 + int(rng.random() * length), DOWN)
+        else:  # b is right of a: open a wall of a's last column
+            length = min(tile, h - y0)
+            grid.open((y0 + int(rng.random() * length)) * w + x0 + tile - 1, RIGHT)
+
+    if on_link is not None:
+        for i in range(len(cells)):
+            new = cells[i] & ~before[i]
+            if new & MASKS[RIGHT]:
+                on_link(i, i + 1)
+            if new & MASKS[DOWN]:
+                on_link(i, i + w)
+
+
+def _copy_tiles(grid: MazeGrid, tile: int, columns: int, tiles: Iterable[bytes]) -> None:
+    """
+    copies generated tiles into the grid, row by row
+    :param grid: the grid
+    :param tile: side of a tile in cells
+    :param columns: number of tiles along x
+    :param tiles: iterable of the cell masks of every tile, in order
+    """
+    w, h = grid.width, grid.height
+    for t, part in enumerate(tiles):
+        x0, y0 = t % columns * tile, t // columns * tile
+        tw, th = min(tile, w - x0), min(tile, h - y0)
+        for y in range(th):
+            grid.cells[(y0 + y) * w + x0:(y0 + y) * w + x0 + tw] = part[y * tw:(y + 1) * tw]